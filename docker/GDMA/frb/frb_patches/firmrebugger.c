@@ -7,6 +7,8 @@
 #include <stdio.h>
 #include <inttypes.h>
 #include <string.h>
+#include <dlfcn.h>
+#include <sys/stat.h>
 #include <sys/time.h>
 #include <signal.h>
 #include <errno.h>
@@ -18,8 +20,47 @@
 #include "qemu/include/qemu/firmrebugger.h"
 #include "/home/user/GDMA/tinycc/libtcc.h"
 
+// Compact event channel for the bug analyzer. With FRB_EVENT_FD set, a hello
+// record "H frb1" is written on init and every first report of a bug as
+// "R <bug_id>" or "T <bug_id>", one line per record in a single write.
+static int frb_event_fd = -1;
+
+static void frb_write_event(char kind, const char *bug_id) {
+  char record[256];
+  int len;
+  if (frb_event_fd < 0)
+    return;
+  len = snprintf(record, sizeof(record), "%c %s\n", kind, bug_id);
+  if (len >= (int)sizeof(record)) {
+    len = sizeof(record) - 1;
+    record[len - 1] = '\n';
+  }
+  if (write(frb_event_fd, record, len) < 0)
+    frb_event_fd = -1;
+}
+
+// With FRB_EXIT_ON_TRIGGER set, emulation ends right after the first triggered
+// bug. Only the first trigger of an input is used by the analyzer.
+static int frb_exit_on_trigger = 0;
+
+static void frb_read_exit_on_trigger(void) {
+  char *exit_on_trigger = getenv("FRB_EXIT_ON_TRIGGER");
+  frb_exit_on_trigger = exit_on_trigger != NULL && *exit_on_trigger != '\0' &&
+                        strcmp(exit_on_trigger, "0") != 0;
+}
+
+static void frb_open_event_fd(void) {
+  char *event_fd = getenv("FRB_EVENT_FD");
+  if (event_fd == NULL || *event_fd == '\0')
+    return;
+  frb_event_fd = atoi(event_fd);
+  frb_write_event('H', "frb1");
+}
+
 static TCCState *tcc_state;
 uint32_t reg_state[16];
+// reg_state of the loaded descriptor
+static uint32_t *frb_regs = reg_state;
 static size_t global_hook_num;
 static uc_engine *uc_state;
 
@@ -50,33 +91,65 @@ static void populate_reg_state(uint32_t *reg_state, uc_engine *uc, uint64_t curr
   uc_reg_read(uc, UC_ARM_REG_R15, &reg_state[15]);
 }
 
-char* reached_bug_ids[100];
-int reached_bug_count = 0;
-char* triggered_bug_ids[100];
-int triggered_bug_count = 0;
+// Bug ids are interned to indices through an open addressing table keyed by
+// the id string, reports are deduplicated with reached/triggered bitsets
+#define FRB_MAX_BUGS 1024
+#define FRB_BUG_TABLE_SIZE 2048
 
-void frb_report_reached(const char* bug_id) {
-  for (int i = 0; i < reached_bug_count; i++) {
-    if (strcmp(reached_bug_ids[i], bug_id) == 0) {
-      return; // Bug already reported
-    }
+static char *frb_bug_ids[FRB_MAX_BUGS];
+static int frb_bug_count = 0;
+static int frb_bug_table[FRB_BUG_TABLE_SIZE]; // interned index + 1, 0 is free
+static uint8_t frb_reached_bits[FRB_MAX_BUGS / 8];
+static uint8_t frb_triggered_bits[FRB_MAX_BUGS / 8];
+
+// Index of bug_id, -1 once FRB_MAX_BUGS ids are interned
+static int frb_intern_bug_id(const char *bug_id) {
+  uint32_t hash = 2166136261u;
+  const char *c;
+  size_t slot;
+  for (c = bug_id; *c; c++)
+    hash = (hash ^ (unsigned char)*c) * 16777619u;
+  slot = hash & (FRB_BUG_TABLE_SIZE - 1);
+  while (frb_bug_table[slot] != 0) {
+    int index = frb_bug_table[slot] - 1;
+    if (strcmp(frb_bug_ids[index], bug_id) == 0)
+      return index;
+    slot = (slot + 1) & (FRB_BUG_TABLE_SIZE - 1);
   }
-  reached_bug_ids[reached_bug_count] = strdup(bug_id);
-  reached_bug_count++;
+  if (frb_bug_count == FRB_MAX_BUGS)
+    return -1;
+  frb_bug_ids[frb_bug_count] = strdup(bug_id);
+  frb_bug_table[slot] = frb_bug_count + 1;
+  return frb_bug_count++;
+}
+
+// Set the bit of index and return whether it was set before
+static int frb_test_and_set(uint8_t *bits, int index) {
+  uint8_t mask = 1 << (index & 7);
+  int was_set = (bits[index >> 3] & mask) != 0;
+  bits[index >> 3] |= mask;
+  return was_set;
+}
+
+void frb_report_reached(const char* bug_id) {
+  int index = frb_intern_bug_id(bug_id);
+  if (index >= 0 && frb_test_and_set(frb_reached_bits, index))
+    return; // Bug already reported
   printf("REACHED: %s\n", bug_id);
+  frb_write_event('R', bug_id);
 }
 
 void frb_report_detected_triggered(const char* bug_id) {
-  for (int i = 0; i < triggered_bug_count; i++) {
-    if (strcmp(triggered_bug_ids[i], bug_id) == 0) {
-      return; // Bug already reported
-    }
-  }
-  if (triggered_bug_count < 100) {
-    triggered_bug_ids[triggered_bug_count] = strdup(bug_id);
-    triggered_bug_count++;
-  }
+  int index = frb_intern_bug_id(bug_id);
+  if (index >= 0 && frb_test_and_set(frb_triggered_bits, index))
+    return; // Bug already reported
   printf("TRIGGERED: %s\n", bug_id);
+  frb_write_event('T', bug_id);
+  if (frb_exit_on_trigger) {
+    fflush(stdout);
+    fflush(stderr);
+    _exit(0);
+  }
 }
 
 
@@ -156,46 +229,225 @@ void handle_error(void *opaque, const char *msg) {
     fprintf(opaque, "%s\n", msg);
 }
 
+// Hooks sorted by address for a binary search on every hit. Hooks sharing an
+// address keep the order of the descriptor.
+typedef struct {
+    uint32_t address;
+    size_t order;
+    func_ptr_t bug_func;
+} frb_hook_entry;
+
+static frb_hook_entry *frb_hooks;
+
+static int frb_compare_hooks(const void *a, const void *b) {
+    const frb_hook_entry *x = a;
+    const frb_hook_entry *y = b;
+    if (x->address != y->address)
+        return x->address < y->address ? -1 : 1;
+    return x->order < y->order ? -1 : x->order > y->order;
+}
+
+static void frb_sort_hooks(void) {
+    size_t i;
+    frb_hooks = malloc(global_hook_num * sizeof(*frb_hooks));
+    if (!frb_hooks)
+        exit(1);
+    for (i = 0; i < global_hook_num; ++i) {
+        frb_hooks[i].address = bug_struct[i].address;
+        frb_hooks[i].order = i;
+        frb_hooks[i].bug_func = bug_struct[i].bug_func;
+    }
+    qsort(frb_hooks, global_hook_num, sizeof(*frb_hooks), frb_compare_hooks);
+}
+
+// First hook at address, global_hook_num if there is none
+static size_t frb_find_hook(uint64_t address) {
+    size_t lo = 0;
+    size_t hi = global_hook_num;
+    while (lo < hi) {
+        size_t mid = lo + (hi - lo) / 2;
+        if (frb_hooks[mid].address < address)
+            lo = mid + 1;
+        else
+            hi = mid;
+    }
+    return lo;
+}
+
 static void firmrebugger_hook(uc_engine *uc, uc_mem_type oracle_address, uint64_t addr, int size, int64_t value, void *user_data) 
 {
   uc_state = uc;
-  for (size_t i = 0; i < global_hook_num; ++i) {
-      if (bug_struct[i].address == oracle_address) {
-        populate_reg_state(reg_state, uc_state, oracle_address);
-        bug_struct[i].bug_func();
-      }
+  size_t i;
+  for (i = frb_find_hook((uint32_t)oracle_address);
+       i < global_hook_num && frb_hooks[i].address == (uint32_t)oracle_address; ++i) {
+      populate_reg_state(frb_regs, uc_state, oracle_address);
+      frb_hooks[i].bug_func();
   }
 }
 
-void firmrebugger_init_config(uc_engine *uc)
-{
-    printf("Initilising firmrebugger\n");
-    char *firmrebugger_config_path = getenv("FIRMREBUGGER_CONFIG");
-    char *bug_context = read_bug_context(firmrebugger_config_path);
-    if (!bug_context)
-    {
-        printf("Please set FIRMREBUGGER_CONFIG path.\n");
-        exit(1);
+// Compiled descriptor cache. The descriptor is compiled once into a shared
+// object named after a hash of its source, later starts only dlopen it. The
+// object cannot link against the emulator, so a binding stub is compiled into
+// it as a second unit: it defines reg_state and forwards the runtime functions
+// through frb_runtime_symbols. FRB_DESCRIPTOR_CACHE sets the cache dir, set to
+// an empty string the descriptor is always compiled in memory. By default the
+// dir is private to the user, below $XDG_CACHE_HOME or /tmp/frb-<uid>. Objects
+// are only loaded from a dir and files that no other user can write.
+#define FRB_DESCRIPTOR_CACHE_NAME "frb_descriptor_cache"
+#define FRB_TINYCC_DIR "/home/user/GDMA/tinycc"
+
+typedef void (*send_context_struct_t)(const context_struct **arr, size_t *size);
+
+static void *frb_runtime_symbols[] = {
+    (void *)frb_mem_read,
+    (void *)frb_mem_write,
+    (void *)frb_report_detected_triggered,
+    (void *)frb_report_reached,
+    (void *)frb_print_reg_state,
+};
+
+static const char frb_binding_stub[] =
+    "#include <stdint.h>\n"
+    "#include <stddef.h>\n"
+    "uint32_t reg_state[16];\n"
+    "static void **frb_runtime;\n"
+    "uint32_t *frb_bind_runtime(void **runtime) {\n"
+    "  frb_runtime = runtime;\n"
+    "  return reg_state;\n"
+    "}\n"
+    "uint32_t frb_mem_read(uint32_t read_addr, size_t size) {\n"
+    "  return ((uint32_t (*)(uint32_t, size_t))frb_runtime[0])(read_addr, size);\n"
+    "}\n"
+    "void frb_mem_write(uint32_t write_addr, uint32_t value, size_t size) {\n"
+    "  ((void (*)(uint32_t, uint32_t, size_t))frb_runtime[1])(write_addr, value, size);\n"
+    "}\n"
+    "void frb_report_detected_triggered(const char *bug_id) {\n"
+    "  ((void (*)(const char *))frb_runtime[2])(bug_id);\n"
+    "}\n"
+    "void frb_report_reached(const char *bug_id) {\n"
+    "  ((void (*)(const char *))frb_runtime[3])(bug_id);\n"
+    "}\n"
+    "void frb_print_reg_state(uint32_t *regs) {\n"
+    "  ((void (*)(uint32_t *))frb_runtime[4])(regs);\n"
+    "}\n";
+
+static uint64_t frb_hash(uint64_t hash, const char *data) {
+    for (; *data; data++) {
+        hash ^= (unsigned char)*data;
+        hash *= 0x100000001b3ULL;
     }
+    return hash;
+}
 
-    tcc_state = tcc_new();
-    if (!tcc_state) {
+static TCCState *frb_new_tcc_state(int output_type) {
+    TCCState *state = tcc_new();
+    if (!state) {
         fprintf(stderr, "Could not create tcc state\n");
         exit(1);
     }
-    tcc_set_error_func(tcc_state, stderr, handle_error);
-
-     // /* if tcclib.h and libtcc1.a are not installed, where can we find them */
-    tcc_add_include_path(tcc_state, "/home/user/GDMA/tinycc");
-    tcc_set_lib_path(tcc_state, "/home/user/GDMA/tinycc");
+    /* set custom error/warning printer */
+    tcc_set_error_func(state, stderr, handle_error);
+    // /* if tcclib.h and libtcc1.a are not installed, where can we find them */
+    tcc_add_include_path(state, FRB_TINYCC_DIR);
+    tcc_set_lib_path(state, FRB_TINYCC_DIR);
     /* MUST BE CALLED before any compilation */
-    tcc_set_output_type(tcc_state, TCC_OUTPUT_MEMORY);
+    tcc_set_output_type(state, output_type);
+    return state;
+}
+
+// A dir or regular file, not a symlink, owned by the user and not writable by
+// group or others
+static int frb_is_private(const char *path, int is_dir) {
+    struct stat st;
+    if (lstat(path, &st) != 0 || st.st_uid != geteuid() || (st.st_mode & 022))
+        return 0;
+    return is_dir ? S_ISDIR(st.st_mode) : S_ISREG(st.st_mode);
+}
+
+static int frb_default_cache_dir(char *dir, size_t size) {
+    const char *xdg_cache = getenv("XDG_CACHE_HOME");
+    char base[4096];
+    if (xdg_cache != NULL && *xdg_cache != '\0') {
+        snprintf(base, sizeof(base), "%s", xdg_cache);
+    } else {
+        snprintf(base, sizeof(base), "/tmp/frb-%u", (unsigned)geteuid());
+        mkdir(base, 0700);
+        if (!frb_is_private(base, 1))
+            return 0;
+    }
+    snprintf(dir, size, "%s/" FRB_DESCRIPTOR_CACHE_NAME, base);
+    return 1;
+}
+
+// Written under a temporary name reserved with O_EXCL first, so emulators
+// starting at the same time never load a partial object
+static int frb_compile_descriptor_object(const char *bug_context, const char *path) {
+    char tmp_path[4096];
+    snprintf(tmp_path, sizeof(tmp_path), "%s.XXXXXX", path);
+    int fd = mkstemp(tmp_path);
+    if (fd < 0)
+        return 0;
+    close(fd);
+    TCCState *state = frb_new_tcc_state(TCC_OUTPUT_DLL);
+    int ok = tcc_compile_string(state, frb_binding_stub) != -1 &&
+             tcc_compile_string(state, bug_context) != -1;
+    ok = ok && tcc_output_file(state, tmp_path) != -1;
+    tcc_delete(state);
+    // tcc recreates the file with its own mode, the dir is private so nobody
+    // else can have replaced it in between
+    if (ok && chmod(tmp_path, 0600) == 0 && rename(tmp_path, path) == 0)
+        return 1;
+    unlink(tmp_path);
+    return 0;
+}
+
+static send_context_struct_t frb_load_cached_descriptor(const char *bug_context) {
+    const char *cache_dir = getenv("FRB_DESCRIPTOR_CACHE");
+    char default_dir[4096];
+    char path[4096];
+    if (cache_dir == NULL) {
+        if (!frb_default_cache_dir(default_dir, sizeof(default_dir)))
+            return NULL;
+        cache_dir = default_dir;
+    }
+    if (*cache_dir == '\0')
+        return NULL;
 
+    uint64_t hash = frb_hash(0xcbf29ce484222325ULL, frb_binding_stub);
+    hash = frb_hash(hash, bug_context);
+    mkdir(cache_dir, 0700);
+    if (!frb_is_private(cache_dir, 1)) {
+        fprintf(stderr, "Descriptor cache %s is not private, not using it\n", cache_dir);
+        return NULL;
+    }
+    snprintf(path, sizeof(path), "%s/frb_%016" PRIx64 ".so", cache_dir, hash);
+    if (access(path, F_OK) != 0 && !frb_compile_descriptor_object(bug_context, path))
+        return NULL;
+    if (!frb_is_private(path, 0)) {
+        fprintf(stderr, "Descriptor object %s is not private, not loading it\n", path);
+        return NULL;
+    }
+
+    void *handle = dlopen(path, RTLD_NOW | RTLD_LOCAL);
+    if (!handle)
+        return NULL;
+    uint32_t *(*bind_runtime)(void **runtime) = dlsym(handle, "frb_bind_runtime");
+    send_context_struct_t send_context_struct = dlsym(handle, "send_context_struct");
+    if (!bind_runtime || !send_context_struct) {
+        dlclose(handle);
+        return NULL;
+    }
+    // reg_state as bound by the descriptor code, hooks write through it
+    frb_regs = bind_runtime(frb_runtime_symbols);
+    return send_context_struct;
+}
+
+// Fallback without the cache, the runtime symbols are added directly
+static send_context_struct_t frb_compile_descriptor_in_memory(const char *bug_context) {
+    tcc_state = frb_new_tcc_state(TCC_OUTPUT_MEMORY);
     if (tcc_compile_string(tcc_state, bug_context) == -1)
-        exit(1);
+        return NULL;
 
-    /* as a test, we add symbols that the compiled program can use.
-       You may also open a dll with tcc_add_dll() and use symbols from that */
     tcc_add_symbol(tcc_state, "reg_state", reg_state);
     tcc_add_symbol(tcc_state, "frb_mem_read", frb_mem_read);
     tcc_add_symbol(tcc_state, "frb_mem_write", frb_mem_write);
@@ -203,14 +455,37 @@ void firmrebugger_init_config(uc_engine *uc)
     tcc_add_symbol(tcc_state, "frb_report_reached", frb_report_reached);
     tcc_add_symbol(tcc_state, "frb_print_reg_state", frb_print_reg_state);
 
-        /* relocate the code */
+    /* relocate the code */
     if (tcc_relocate(tcc_state) < 0)
+        return NULL;
+    return tcc_get_symbol(tcc_state, "send_context_struct");
+}
+
+static send_context_struct_t frb_load_descriptor(const char *bug_context) {
+    send_context_struct_t send_context_struct = frb_load_cached_descriptor(bug_context);
+    if (send_context_struct)
+        return send_context_struct;
+    return frb_compile_descriptor_in_memory(bug_context);
+}
+
+void firmrebugger_init_config(uc_engine *uc)
+{
+    printf("Initilising firmrebugger\n");
+    frb_open_event_fd();
+    frb_read_exit_on_trigger();
+    char *firmrebugger_config_path = getenv("FIRMREBUGGER_CONFIG");
+    char *bug_context = read_bug_context(firmrebugger_config_path);
+    if (!bug_context)
+    {
+        printf("Please set FIRMREBUGGER_CONFIG path.\n");
         exit(1);
+    }
 
-    void (*send_context_struct)(const context_struct **arr, size_t *size) = tcc_get_symbol(tcc_state, "send_context_struct");
+    send_context_struct_t send_context_struct = frb_load_descriptor(bug_context);
     if (!send_context_struct)
       exit(1);
     send_context_struct(&bug_struct, &global_hook_num);
+    frb_sort_hooks();
     uc_hook tmp;
     for (size_t i = 0; i < global_hook_num; ++i) {
         printf("Hooking: %x \n", bug_struct[i].address );
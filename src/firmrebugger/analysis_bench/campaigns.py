@@ -0,0 +1,332 @@
+import io
+import os
+import sys
+import json
+import math
+import random
+import tarfile
+import yaml
+import zstandard
+
+BENCH_TARGET = "FRB_Bench"
+START_TIME = 1700000000
+STUB_NAME = "frb_stub_replayer"
+
+# Replay cost of a seed per backend as (start-up ms, median ms, sigma) of a
+# lognormal distribution. The Python based replayers pay most of their time
+# starting up, the QEMU and Rust based ones are dominated by the seed itself.
+LATENCY_PROFILES = {
+    "Ember-IO-Fuzzing": (20, 15, 0.6),
+    "Fuzzware": (2500, 120, 0.8),
+    "Fuzzware-Icicle": (1500, 60, 0.8),
+    "SplITS": (2500, 150, 0.8),
+    "GDMA": (2500, 150, 0.8),
+    "Hoedur": (30, 25, 0.7),
+    "MultiFuzz": (40, 20, 0.7),
+    "SEmu-Fuzz": (1800, 200, 0.9),
+    "DICE": (300, 80, 0.7),
+}
+
+FUZZWARE_FAMILY = {"Fuzzware", "Fuzzware-Icicle", "SplITS", "GDMA"}
+
+
+def get_bug_ids(num_bugs):
+    return [f"BENCH_BUG_{idx:03d}" for idx in range(num_bugs)]
+
+
+def write_descriptor(path, bug_ids):
+    with open(path, "w") as f:
+        f.write("// Synthetic bug descriptor of the analysis benchmark\n")
+        for bug_id in bug_ids:
+            f.write(f'void bug_{bug_id}(void) {{ report_detected_triggered("{bug_id}"); }}\n')
+
+
+# The stub is written as a script for the current interpreter and linked under
+# the name of every replay command
+def install_stub(stub_dir):
+    stub_path = os.path.join(stub_dir, STUB_NAME)
+    source_path = os.path.join(os.path.dirname(__file__), "stub_replayer.py")
+    with open(source_path, "r") as f:
+        source = f.read()
+    os.makedirs(stub_dir, exist_ok=True)
+    with open(stub_path, "w") as f:
+        f.write(f"#!{sys.executable} -S\n{source}")
+    os.chmod(stub_path, 0o755)
+    return stub_path
+
+
+def link_stub(stub_path, command_path):
+    os.makedirs(os.path.dirname(command_path), exist_ok=True)
+    if os.path.lexists(command_path):
+        os.remove(command_path)
+    os.symlink(stub_path, command_path)
+
+
+# Seeds of a single run. Bugs get a depth, deeper bugs are reached and
+# triggered by fewer seeds. Every seed triggers at most one bug, and only bugs
+# it also reaches. Crash seeds that trigger nothing end up ungrouped.
+def generate_seeds(rng, bug_ids, queue_seeds, crash_seeds, total_time, latency):
+    depths = {bug_id: rng.uniform(0.05, 0.6) for bug_id in bug_ids}
+    seeds = []
+    for Crash, count in ((False, queue_seeds), (True, crash_seeds)):
+        times = sorted(rng.randint(0, total_time) for _ in range(count))
+        for seed_time in times:
+            reached = [b for b in bug_ids if rng.random() < depths[b]]
+            triggered = []
+            trigger_chance = 0.9 if Crash else 0.05
+            if reached and rng.random() < trigger_chance:
+                triggered = [rng.choice(reached)]
+            seeds.append(
+                {
+                    "time": seed_time,
+                    "Crash": Crash,
+                    "reached": reached,
+                    "triggered": triggered,
+                    "latency_ms": round(rng.lognormvariate(*latency), 3),
+                    "size": rng.randint(16, 1024),
+                }
+            )
+    return seeds
+
+
+def seed_content(rng, seed):
+    reached = ",".join(seed["reached"]) or "-"
+    triggered = ",".join(seed["triggered"]) or "-"
+    header = f"FRBSTUB {seed['latency_ms']} {reached} {triggered}\n".encode()
+    return header + rng.randbytes(seed["size"])
+
+
+# Bug times the analysis has to report for the seeds of a run, keyed by bug
+# id as [reached, triggered, detected]
+def expected_run(bug_ids, seeds):
+    bugs = {bug_id: [None, None, None] for bug_id in bug_ids}
+    ungrouped = 0
+
+    def lower(times, idx, value):
+        if times[idx] is None or value < times[idx]:
+            times[idx] = value
+
+    for seed in seeds:
+        for bug_id in seed["reached"]:
+            lower(bugs[bug_id], 0, seed["time"])
+        if seed["triggered"]:
+            times = bugs[seed["triggered"][0]]
+            lower(times, 1, seed["time"])
+            if seed["Crash"]:
+                lower(times, 2, seed["time"])
+        elif seed["Crash"]:
+            ungrouped += 1
+    return {"bugs": bugs, "ungrouped_crashes": ungrouped}
+
+
+def afl_seed_name(idx, seed):
+    if seed["Crash"]:
+        return f"id:{idx:06d},sig:11,src:000000,time:{seed['time'] * 1000},execs:{idx * 977},op:havoc,rep:2"
+    return f"id:{idx:06d},src:000000,time:{seed['time'] * 1000},execs:{idx * 977},op:havoc,rep:4,+cov"
+
+
+def set_mtime(path, seconds):
+    mtime_ns = (START_TIME + seconds) * 1_000_000_000
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def write_seed_dirs(rng, seed_root, seeds, name_seed, timed=False):
+    for name in ("queue", "crashes"):
+        os.makedirs(os.path.join(seed_root, name), exist_ok=True)
+        with open(os.path.join(seed_root, name, "README.txt"), "w") as f:
+            f.write("Synthetic seeds of the FirmReBugger analysis benchmark\n")
+    for idx, seed in enumerate(seeds):
+        folder = "crashes" if seed["Crash"] else "queue"
+        seed_path = os.path.join(seed_root, folder, name_seed(idx, seed))
+        with open(seed_path, "wb") as f:
+            f.write(seed_content(rng, seed))
+        if timed:
+            set_mtime(seed_path, seed["time"])
+
+
+def write_fuzzer_stats(path):
+    with open(path, "w") as f:
+        f.write(f"start_time        : {START_TIME}\n")
+        f.write(f"last_update       : {START_TIME + 60}\n")
+
+
+def write_ember_run(rng, output, seeds, stub_path):
+    default_dir = os.path.join(output, "default")
+    write_seed_dirs(rng, default_dir, seeds, afl_seed_name)
+    with open(os.path.join(default_dir, "cmdline"), "w") as f:
+        f.write("/fw/FRB_Bench.elf\n-machine\nmps2-an385\n@@\n")
+
+
+def write_semu_run(rng, output, seeds, stub_path):
+    write_seed_dirs(rng, os.path.join(output, "default"), seeds, afl_seed_name)
+
+
+def write_dice_run(rng, output, seeds, stub_path):
+    default_dir = os.path.join(output, "default")
+    write_seed_dirs(rng, default_dir, seeds, afl_seed_name, timed=True)
+    write_fuzzer_stats(os.path.join(default_dir, "fuzzer_stats"))
+    for model in ("0", "1", "3"):
+        os.makedirs(os.path.join(output, model), exist_ok=True)
+    link_stub(stub_path, os.path.join(output, "run_fw.py"))
+
+
+def write_fuzzware_run(rng, output, seeds, stub_path):
+    main_dir = os.path.join(output, "main001")
+    fuzzer_dir = os.path.join(main_dir, "fuzzers", "fuzzer1")
+    write_seed_dirs(rng, fuzzer_dir, seeds, afl_seed_name, timed=True)
+    write_fuzzer_stats(os.path.join(fuzzer_dir, "fuzzer_stats"))
+    with open(os.path.join(main_dir, "config.yml"), "w") as f:
+        f.write("include:\n  - ../../config.yml\n")
+
+
+def add_tar_member(tar, name, data, seconds):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = START_TIME + seconds
+    tar.addfile(info, fileobj=io.BytesIO(data))
+
+
+def write_hoedur_run(rng, output, seeds, stub_path):
+    os.makedirs(output, exist_ok=True)
+    corpus_path = os.path.join(output, "output.corpus.tar.zst")
+    with open(corpus_path, "wb") as out:
+        cctx = zstandard.ZstdCompressor()
+        with cctx.stream_writer(out) as writer, tarfile.open(
+            fileobj=writer, mode="w|"
+        ) as tar:
+            meta = yaml.safe_dump({"timestamp": START_TIME}).encode()
+            add_tar_member(tar, "meta.yml", meta, 0)
+            add_tar_member(tar, "config/config.yml", b"target: FRB_Bench\n", 0)
+            for idx, seed in enumerate(seeds):
+                folder = "crash" if seed["Crash"] else "input"
+                name = f"{folder}/{folder}-{idx:06d}.bin"
+                add_tar_member(tar, name, seed_content(rng, seed), seed["time"])
+
+
+def write_multifuzz_run(rng, output, seeds, stub_path):
+    write_seed_dirs(rng, output, seeds, lambda idx, seed: f"{idx:06d}", timed=True)
+    with open(os.path.join(output, "cmplog"), "w") as f:
+        f.write("")
+    set_mtime(os.path.join(output, "cmplog"), 0)
+
+
+RUN_WRITERS = {
+    "Ember-IO-Fuzzing": write_ember_run,
+    "Fuzzware": write_fuzzware_run,
+    "Fuzzware-Icicle": write_fuzzware_run,
+    "SplITS": write_fuzzware_run,
+    "GDMA": write_fuzzware_run,
+    "Hoedur": write_hoedur_run,
+    "MultiFuzz": write_multifuzz_run,
+    "SEmu-Fuzz": write_semu_run,
+    "DICE": write_dice_run,
+}
+
+
+# Link the stub where the analyzer of the fuzzer looks for its replay command
+# and return the environment the analysis needs
+def install_backend(root, fuzzer, stub_path, stub_config_path):
+    bin_dir = os.path.join(root, "bin")
+    base_dir = os.path.join(root, "backends")
+    env = {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "FRB_STUB_CONFIG": stub_config_path,
+        # Keys the replay cache of --use-cache
+        "FRB_EMULATOR_ID": f"frb-stub:{fuzzer}",
+    }
+    if fuzzer == "Ember-IO-Fuzzing":
+        env["EMBER_BASE_DIR"] = os.path.join(base_dir, "ember")
+        link_stub(
+            stub_path,
+            os.path.join(env["EMBER_BASE_DIR"], "AFLplusplus", "afl-qemu-trace"),
+        )
+    elif fuzzer in FUZZWARE_FAMILY:
+        link_stub(stub_path, os.path.join(bin_dir, "fuzzware"))
+        env["GHIDRA_SRC"] = os.path.join(base_dir, "ghidra")
+    elif fuzzer == "Hoedur":
+        env["HOEDUR_BASE_DIR"] = os.path.join(base_dir, "hoedur")
+        os.makedirs(env["HOEDUR_BASE_DIR"], exist_ok=True)
+        link_stub(stub_path, os.path.join(bin_dir, "hoedur-dict-arm"))
+    elif fuzzer == "MultiFuzz":
+        env["MULTIFUZZ_BASE_DIR"] = os.path.join(base_dir, "multifuzz")
+        env["GHIDRA_SRC"] = os.path.join(base_dir, "ghidra")
+        link_stub(
+            stub_path,
+            os.path.join(env["MULTIFUZZ_BASE_DIR"], "target", "release", "hail-fuzz"),
+        )
+    elif fuzzer == "SEmu-Fuzz":
+        link_stub(stub_path, os.path.join(bin_dir, "semu-fuzz"))
+    return env
+
+
+# Generate a synthetic campaign of a fuzzer below root, laid out like
+# <target>/fuzzers/<fuzzer>/fuzzing_out/<name> with one output-XX dir per run
+# in the layout of the fuzzer. Returns the results dir, the descriptor, the
+# environment for the analysis and the bug times the report has to contain.
+def generate_campaign(
+    root,
+    fuzzer,
+    runs=2,
+    queue_seeds=200,
+    crash_seeds=20,
+    num_bugs=8,
+    total_time=86400,
+    latency_scale=0.1,
+    seed=0,
+    stub_options=None,
+):
+    rng = random.Random(f"{seed}:{fuzzer}")
+    bug_ids = get_bug_ids(num_bugs)
+
+    target_dir = os.path.join(root, BENCH_TARGET)
+    results_dir = os.path.join(target_dir, "fuzzers", fuzzer, "fuzzing_out", "bench")
+    os.makedirs(results_dir)
+    descriptor_path = os.path.join(target_dir, "bug_descriptor.c")
+    write_descriptor(descriptor_path, bug_ids)
+
+    startup_ms, median_ms, sigma = LATENCY_PROFILES[fuzzer]
+    stub_config = {"startup_ms": startup_ms * latency_scale}
+    stub_config.update(stub_options or {})
+    stub_config_path = os.path.join(root, "stub_config.json")
+    with open(stub_config_path, "w") as f:
+        json.dump(stub_config, f, indent=4)
+
+    stub_path = install_stub(os.path.join(root, "stub"))
+    env = install_backend(root, fuzzer, stub_path, stub_config_path)
+
+    with open(os.path.join(results_dir, "frb_bench_info.yml"), "w") as f:
+        yaml.dump(
+            {
+                "Fuzzer": fuzzer,
+                "Target": BENCH_TARGET,
+                "Num_Trials": runs,
+                "Planned_Time": total_time,
+                "Start_Time": START_TIME,
+                "End_Time": START_TIME + total_time,
+                "Total_Time": total_time,
+            },
+            f,
+            sort_keys=False,
+        )
+    with open(os.path.join(results_dir, "config.yml"), "w") as f:
+        f.write("# Synthetic target of the FirmReBugger analysis benchmark\n")
+    open(os.path.join(results_dir, f"{BENCH_TARGET}.elf"), "wb").close()
+
+    latency = (math.log(max(median_ms * latency_scale, 1e-3)), sigma)
+    expected = {}
+    for trial in range(runs):
+        output = os.path.join(results_dir, f"output-{trial + 1:02d}")
+        seeds = generate_seeds(
+            rng, bug_ids, queue_seeds, crash_seeds, total_time, latency
+        )
+        RUN_WRITERS[fuzzer](rng, output, seeds, stub_path)
+        expected[f"run-{trial + 1}"] = expected_run(bug_ids, seeds)
+
+    return {
+        "results_dir": results_dir,
+        "descriptor_path": descriptor_path,
+        "env": env,
+        "expected": expected,
+        "seeds": runs * (queue_seeds + crash_seeds),
+    }
+
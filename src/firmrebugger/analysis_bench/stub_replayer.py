@@ -0,0 +1,99 @@
+# Stub replayer for the analysis benchmark. It is installed under the name of
+# every backend's replay command and answers the seeds of a synthetic campaign
+# without an emulator. The first line of a seed tells it what to do:
+#
+#   FRBSTUB <latency_ms> <reached ids> <triggered ids>
+#
+# with comma separated bug ids and "-" for none. The stub sleeps for the
+# latency and prints the usual REACHED:/TRIGGERED: lines. FRB_STUB_CONFIG
+# points to a JSON file with the options below. "startup_ms" is paid once per
+# process, with "events" the records are also written to the FRB_EVENT_FD
+# channel and "noise_lines" adds lines of verbose emulator output per seed.
+#
+# This file runs as a standalone script, it only uses the standard library.
+import os
+import sys
+import json
+import time
+
+SEED_MAGIC = "FRBSTUB"
+EVENT_HELLO = "frb1"
+
+DEFAULT_CONFIG = {
+    "startup_ms": 0,
+    "events": True,
+    "noise_lines": 0,
+}
+
+
+def load_config():
+    config = dict(DEFAULT_CONFIG)
+    config_path = os.environ.get("FRB_STUB_CONFIG")
+    if config_path:
+        with open(config_path, "r") as f:
+            config.update(json.load(f))
+    return config
+
+
+def read_seed(seed_path):
+    try:
+        with open(seed_path, "rb") as f:
+            fields = f.readline().decode(errors="replace").split()
+    except OSError:
+        return 0.0, [], []
+    if len(fields) != 4 or fields[0] != SEED_MAGIC:
+        return 0.0, [], []
+
+    def ids(field):
+        return [] if field == "-" else field.split(",")
+
+    return float(fields[1]) / 1000, ids(fields[2]), ids(fields[3])
+
+
+# SEmu takes the seed before its config, MultiFuzz takes it from REPLAY
+def get_seed_arg(argv):
+    if os.environ.get("REPLAY"):
+        return os.environ["REPLAY"]
+    if os.path.basename(argv[0]) == "semu-fuzz":
+        return argv[1] if len(argv) > 2 else None
+    return argv[-1] if len(argv) > 1 else None
+
+
+# With exit_on_trigger the replay ends at the first triggered bug, like the
+# runtime does with FRB_EXIT_ON_TRIGGER, and reports the unread input
+def replay(seed_path, config, out, event_fd, exit_on_trigger=False):
+    latency, reached, triggered = read_seed(seed_path)
+    time.sleep(latency)
+    for idx in range(config["noise_lines"]):
+        out.write(f"Basic block 0x{0x08000000 + idx * 4:08x} hit\n")
+    records = (("R", "REACHED", reached), ("T", "TRIGGERED", triggered))
+    for kind, prefix, bug_ids in records:
+        for bug_id in bug_ids:
+            out.write(f"{prefix}: {bug_id}\n")
+            if event_fd is not None:
+                os.write(event_fd, f"{kind} {bug_id}\n".encode())
+            if kind == "T" and exit_on_trigger:
+                sys.stderr.write("input file not read until end\n")
+                return
+
+
+def main():
+    config = load_config()
+    out = sys.stdout
+    time.sleep(config["startup_ms"] / 1000)
+
+    event_fd = None
+    if config["events"] and os.environ.get("FRB_EVENT_FD"):
+        event_fd = int(os.environ["FRB_EVENT_FD"])
+        os.write(event_fd, f"H {EVENT_HELLO}\n".encode())
+
+    exit_on_trigger = os.environ.get("FRB_EXIT_ON_TRIGGER", "0") not in ("", "0")
+    seed_path = get_seed_arg(sys.argv)
+    if seed_path is not None:
+        replay(seed_path, config, out, event_fd, exit_on_trigger)
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import sys
+
+
+# Times of a single bug in a single run
+class BugRecord:
+    __slots__ = ("bug_id", "reached", "triggered", "detected", "raw_crash_data")
+
+    def __init__(self, bug_id):
+        self.bug_id = bug_id
+        self.reached = None
+        self.triggered = None
+        self.detected = None
+        self.raw_crash_data = set()
+
+    def to_report(self):
+        return {
+            "bug_id": self.bug_id,
+            "reached": self.reached,
+            "triggered": self.triggered,
+            "detected": self.detected,
+            "raw_crash_data": sorted(self.raw_crash_data),
+        }
+
+
+# Bug records of a run, indexed like CampaignModel.bug_ids. Seeds whose
+# replay timed out or had to be retried are kept next to the crash lists.
+class RunRecord:
+    __slots__ = (
+        "bugs",
+        "ungrouped_crashes",
+        "multi_bugs_triggered",
+        "hung_seeds",
+        "retried_seeds",
+    )
+
+    def __init__(self, bug_ids):
+        self.bugs = [BugRecord(bug_id) for bug_id in bug_ids]
+        self.ungrouped_crashes = set()
+        self.multi_bugs_triggered = set()
+        self.hung_seeds = set()
+        self.retried_seeds = set()
+
+    def to_report(self):
+        run_data = [
+            {"ungrouped_crashes": sorted(self.ungrouped_crashes)},
+            {"multi_bugs_triggered": sorted(self.multi_bugs_triggered)},
+            {"hung_seeds": sorted(self.hung_seeds)},
+            {"retried_seeds": sorted(self.retried_seeds)},
+        ]
+        run_data.extend(bug.to_report() for bug in self.bugs)
+        return run_data
+
+
+# Bug times of every run of a campaign. Bug ids are interned and mapped to an
+# index once, so updates never scan the bug list. Serializes to the
+# "Campaign" section of frb_report.json.
+class CampaignModel:
+    def __init__(self, bug_ids):
+        self.bug_ids = [sys.intern(bug_id) for bug_id in bug_ids]
+        self.bug_index = {bug_id: idx for idx, bug_id in enumerate(self.bug_ids)}
+        self.runs = {}
+
+    def add_run(self, run_name):
+        if run_name not in self.runs:
+            self.runs[run_name] = RunRecord(self.bug_ids)
+        return self.runs[run_name]
+
+    def get_bug(self, run_name, bug_id):
+        idx = self.bug_index.get(bug_id)
+        if idx is None:
+            return None
+        return self.runs[run_name].bugs[idx]
+
+    # Record the result of a replayed seed. Only the first triggered bug of a
+    # seed counts, crash seeds also set the detected time.
+    def update(
+        self,
+        run_name,
+        time_val,
+        seed_path,
+        bugs_reached=None,
+        bugs_triggered=None,
+        Crash=False,
+    ):
+        time_val = int(time_val)
+        run = self.runs[run_name]
+        for bug_id in bugs_reached or []:
+            bug = self.get_bug(run_name, bug_id)
+            if bug is not None and (bug.reached is None or time_val < bug.reached):
+                bug.reached = time_val
+
+        if bugs_triggered:
+            bug = self.get_bug(run_name, bugs_triggered[0])
+            if bug is not None:
+                if bug.triggered is None or time_val < bug.triggered:
+                    bug.triggered = time_val
+                if Crash:
+                    bug.raw_crash_data.add(seed_path)
+                    if bug.detected is None or time_val < bug.detected:
+                        bug.detected = time_val
+            if len(bugs_triggered) > 1 and Crash:
+                run.multi_bugs_triggered.add(seed_path)
+        elif Crash:
+            run.ungrouped_crashes.add(seed_path)
+
+    # Seeds only lower recorded times, so a seed found no earlier than every
+    # time it could affect cannot change the run. Queue seeds never set
+    # detected. A bug that was never reached can be reached by any seed, so
+    # nothing is skipped in a run while one of its bugs has no time.
+    def can_improve(self, run_name, time_val, Crash):
+        time_val = int(time_val)
+        for bug in self.runs[run_name].bugs:
+            if bug.reached is None or time_val < bug.reached:
+                return True
+            if bug.triggered is None or time_val < bug.triggered:
+                return True
+            if Crash and (bug.detected is None or time_val < bug.detected):
+                return True
+        return False
+
+    def to_report(self):
+        return {run_name: run.to_report() for run_name, run in self.runs.items()}
+
+    # Rebuild the model from the "Campaign" section of frb_report.json
+    @classmethod
+    def from_report(cls, campaign_data):
+        bug_ids = []
+        for run_data in campaign_data.values():
+            for entry in run_data:
+                bug_id = entry.get("bug_id")
+                if bug_id is not None and bug_id not in bug_ids:
+                    bug_ids.append(bug_id)
+
+        model = cls(bug_ids)
+        for run_name, run_data in campaign_data.items():
+            run = model.add_run(run_name)
+            for entry in run_data:
+                if "ungrouped_crashes" in entry:
+                    run.ungrouped_crashes.update(entry["ungrouped_crashes"] or [])
+                elif "multi_bugs_triggered" in entry:
+                    run.multi_bugs_triggered.update(entry["multi_bugs_triggered"] or [])
+                elif "hung_seeds" in entry:
+                    run.hung_seeds.update(entry["hung_seeds"] or [])
+                elif "retried_seeds" in entry:
+                    run.retried_seeds.update(entry["retried_seeds"] or [])
+                elif entry.get("bug_id") is not None:
+                    bug = model.get_bug(run_name, entry["bug_id"])
+                    bug.reached = entry.get("reached")
+                    bug.triggered = entry.get("triggered")
+                    bug.detected = entry.get("detected")
+                    bug.raw_crash_data.update(entry.get("raw_crash_data") or [])
+        return model
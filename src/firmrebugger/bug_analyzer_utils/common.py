@@ -4,7 +4,27 @@ import time
 import subprocess
 import re
 import sys
-import io
+import shutil
+import signal
+import resource
+import tempfile
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from firmrebugger.bug_analyzer_utils.progress import log_message
+
+SCRATCH_DIR_NAME = ".frb_scratch"
+CHECKPOINT_INTERVAL = 60
+
+# Share of the memory available at the start of a replay pass that concurrent
+# replays may use, measured by the peak RSS of the replays so far
+MEMORY_BUDGET = 0.8
+
+# Seconds between checks of the CPU share the replays run on
+CPU_CHECK_INTERVAL = 5
 
 
 def extract_bug_ids(file_path):
@@ -27,41 +47,17 @@ def extract_bug_ids(file_path):
     return bug_ids
 
 
-# Initialize the run data structure
-def init_run(campaign_data, run_name):
-    if run_name not in campaign_data:
-        campaign_data[run_name] = []
-        campaign_data[run_name].append({"ungrouped_crashes": []})
-        campaign_data[run_name].append({"multi_bugs_triggered": []})
-    return campaign_data
-
-
-# Initialize bug information in the run data
-def init_bug_info(run_data, bug_id):
-    run_data.append(
-        {
-            "bug_id": bug_id,
-            "reached": None,
-            "triggered": None,
-            "detected": None,
-            "raw_crash_data": [],
-        }
-    )
-    return run_data
-
-
-# Print bug information
-def print_bug_info(run_data):
-    for bug in run_data:
-        if "bug_id" in bug:
+# Print bug information of a RunRecord
+def print_bug_info(run):
+    for bug in run.bugs:
+        print(
+            f"Bug ID: {bug.bug_id}, Reached: {bug.reached}, Triggered: {bug.triggered}, Detected: {bug.detected}"
+        )
+        if bug.reached is None and bug.triggered is not None:
             print(
-                f"Bug ID: {bug['bug_id']}, Reached: {bug['reached']}, Triggered: {bug['triggered']}, Detected: {bug['detected']}"
+                f"Bug ID: {bug.bug_id} has no reached time but has triggered time: {bug.triggered} check Raven"
             )
-            if bug["reached"] is None and bug["triggered"] is not None:
-                print(
-                    f"Bug ID: {bug['bug_id']} has no reached time but has triggered time: {bug['triggered']} check Raven"
-                )
-                os._exit(1)
+            os._exit(1)
 
 
 # Update execution time for a seed during bug analysis
@@ -76,150 +72,229 @@ def add_execution_time(all_times, data):
     }
 
 
-# Update bugs that are ungrouped
-def append_to_ungrouped_crashes(run_data, crash_path):
-    print(f"Appending ungrouped crash: {crash_path}")
-    # _os.exit(1)
-    for entry in run_data:
-        if "ungrouped_crashes" in entry:
-            entry["ungrouped_crashes"].append(crash_path)
-            return run_data
-    return run_data
-
-
-def count_lines_of_bug_info(run_data):
-    buf = io.StringIO()
-    sys_stdout = sys.stdout
-    sys.stdout = buf
-    print_bug_info(run_data)
-    sys.stdout = sys_stdout
-    bug_info_output = buf.getvalue()
-    return bug_info_output.count("\n")
-
-
-# Print progress of bug analsis
-def periodic_printer(run_data, stop_event, progress, crash):
-    import sys
-
-    crash_str = "Crash" if crash else "Reached"
-    prev_lines_printed = 0
-    while not stop_event.is_set() and progress["completed"] < progress["total"]:
-        lines_to_print = 1 + count_lines_of_bug_info(run_data)
-
-        for _ in range(prev_lines_printed):
-            sys.stdout.write("\x1b[1A")
-        for _ in range(prev_lines_printed):
-            sys.stdout.write("\x1b[2K")
-            sys.stdout.write("\x1b[1B")
-        for _ in range(prev_lines_printed):
-            sys.stdout.write("\x1b[1A")
-        sys.stdout.flush()
-
-        print(
-            f"[Progress {crash_str}] Completed: {progress['completed']}/{progress['total']} | "
-            f"{progress['Fuzzer']} | "
-            f"{progress['Target']} | "
-            f"{progress['run_name']} | "
-            f"Total Ungrouped crashes: {progress['ungrouped_crashes']} |"
-        )
-        print_bug_info(run_data)
-        sys.stdout.flush()
-        prev_lines_printed = lines_to_print
-        stop_event.wait(5)
-
-    for _ in range(prev_lines_printed):
-        sys.stdout.write("\x1b[1A")
-    for _ in range(prev_lines_printed):
-        sys.stdout.write("\x1b[2K")
-        sys.stdout.write("\x1b[1B")
-    for _ in range(prev_lines_printed):
-        sys.stdout.write("\x1b[1A")
-    sys.stdout.flush()
-
-    # Print the final summary
-    print(
-        f"[Progress {crash_str}] Completed: {progress['total']}/{progress['total']} | "
-        f"{progress['Fuzzer']} | "
-        f"{progress['Target']} | "
-        f"{progress['run_name']} | "
-        f"Total Ungrouped crashes: {progress['ungrouped_crashes']} |"
-    )
-    print_bug_info(run_data)
-    sys.stdout.flush()
-
-
-# Update if mutliple bugs were triggered
-def append_to_multi_bugs_triggered(run_data, seed_path):
-    for entry in run_data:
-        if "multi_bugs_triggered" in entry:
-            entry["multi_bugs_triggered"].append(seed_path)
-            return run_data
-    return run_data
-
-
-# Update bug triggered time
-def update_triggered_time(run_data, bug_id, time):
-    for bug in run_data:
-        if bug.get("bug_id") == bug_id:
-            if bug["triggered"] is None or (
-                time is not None and time < bug["triggered"]
-            ):
-                bug["triggered"] = time
-                return run_data
-    return run_data
-
-
-# Update bug reached time
-def update_reached_time(run_data, bug_id, time):
-    for bug in run_data:
-        if bug.get("bug_id") == bug_id:
-            if bug["reached"] is None or (time is not None and time < bug["reached"]):
-                bug["reached"] = time
-                return run_data
-    return run_data
-
-
-# Update bug detected time
-def update_detected_time(run_data, bug_id, time):
-    for bug in run_data:
-        if bug.get("bug_id") == bug_id:
-            if bug["detected"] is None or (time is not None and time < bug["detected"]):
-                bug["detected"] = time
-                return run_data
-    return run_data
-
-
-# Update raw crash data for a bug
-def append_raw_crash_data(run_data, bug_id, seed_path):
-    for bug in run_data:
-        if bug.get("bug_id") == bug_id:
-            if seed_path not in bug["raw_crash_data"]:
-                bug["raw_crash_data"].append(seed_path)
-            return run_data
-    return run_data
-
-
-# Update bug data function
-def update_bug_data(
-    run_data, time_val, seed_path, bugs_reached=None, bugs_triggered=None, Crash=False
+# Per-run directory for seeds an analyzer has to materialize before replay,
+# e.g. members of a corpus archive
+def create_scratch_dir(output_path):
+    scratch_dir = os.path.join(output_path, SCRATCH_DIR_NAME)
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    os.makedirs(scratch_dir)
+    return scratch_dir
+
+
+def remove_scratch_dir(output_path):
+    shutil.rmtree(os.path.join(output_path, SCRATCH_DIR_NAME), ignore_errors=True)
+
+
+# Replay the seeds of a campaign in one worker pool. Each seed job is a dict
+# built by the analyzers with the arguments for replay_seed, tagged with its
+# kind through "Crash" and with the run it belongs to through "run", and its
+# result is recorded in that run of the CampaignModel. Jobs may also be a
+# generator, then seeds are pulled only as fast as the pool replays them.
+# Jobs tagged "scratch" replay a file from the scratch dir that is removed
+# once its result is in. Jobs with a "cwd" are replayed in that directory,
+# the working directory of the analyzer itself is never changed. Replays are killed after replay_timeout seconds.
+# With a witness_dir the output of every crash seed is written below it.
+# With exit_on_trigger, crash seeds stop at their first triggered bug.
+# The latency and resource usage of every replay is recorded in the
+# instrumentation if given. One replay runs per CPU of the analyzer's share,
+# unless the largest peak RSS of a replay so far says fewer of them fit into
+# the available memory.
+#
+# With an anytime dict, seeds are replayed crash seeds first and in order of
+# discovery time, seeds that cannot lower any recorded time are skipped and
+# no new seeds are started after the deadline. The outcome is recorded in the
+# anytime dict, checkpoint is called every CHECKPOINT_INTERVAL seconds.
+def replay_seeds(
+    jobs,
+    campaign,
+    progress,
+    replay_cache=None,
+    replay_timeout=None,
+    anytime=None,
+    deadline=None,
+    checkpoint=None,
+    witness_dir=None,
+    exit_on_trigger=True,
+    instrumentation=None,
 ):
-    time_val = int(time_val)
-    if bugs_triggered is None:
-        bugs_triggered = []
-    if bugs_reached is None:
-        bugs_reached = []
-    for bug in bugs_reached:
-        run_data = update_reached_time(run_data, bug, time_val)
-    if len(bugs_triggered) > 0:
-        run_data = update_triggered_time(run_data, bugs_triggered[0], time_val)
-        if Crash:
-            run_data = append_raw_crash_data(run_data, bugs_triggered[0], seed_path)
-            run_data = update_detected_time(run_data, bugs_triggered[0], time_val)
-    if len(bugs_triggered) > 1 and Crash:
-        run_data = append_to_multi_bugs_triggered(run_data, seed_path)
-    if len(bugs_triggered) == 0 and Crash:
-        run_data = append_to_ungrouped_crashes(run_data, seed_path)
-    return run_data
+    execution_times = []
+    num_workers = get_replay_workers()
+    memory_limit = sys.maxsize
+    if anytime is not None:
+        jobs = sorted(jobs, key=lambda job: (not job["Crash"], int(job["time_val"])))
+    available_memory = get_available_memory()
+    peak_rss = 0
+
+    if isinstance(jobs, list):
+        for job in jobs:
+            progress.add(job)
+
+    last_checkpoint = time.monotonic()
+    last_cpu_check = last_checkpoint
+
+    def collect(done):
+        nonlocal last_checkpoint, memory_limit, peak_rss
+        for future in done:
+            job = futures.pop(future)
+            result = future.result()
+            if job.get("scratch"):
+                os.remove(job.get("seed_file") or job["seed_path"])
+            if result is None:
+                continue
+            (
+                seed_path,
+                bugs_triggered,
+                bugs_reached,
+                time_val,
+                elapsed,
+                errors,
+                outcome,
+                usage,
+                attempts,
+            ) = result
+            execution_times.append(elapsed)
+            if instrumentation is not None:
+                instrumentation.record(
+                    job, elapsed, outcome, cached=attempts == 0, usage=usage
+                )
+            if usage is not None and (usage["max_rss_kib"] or 0) > peak_rss:
+                peak_rss = usage["max_rss_kib"]
+                limit = memory_limited_replays(available_memory, peak_rss)
+                if limit < min(memory_limit, num_workers):
+                    log_message(
+                        f"Replays peak at {peak_rss // 1024} MiB RSS, "
+                        f"running at most {limit} at once"
+                    )
+                    memory_limit = limit
+            progress.complete(job, outcome)
+            run = campaign.runs[job["run"]]
+            if attempts > 1:
+                run.retried_seeds.add(seed_path)
+            if outcome == "timeout":
+                log_message(f"Replay of {seed_path} timed out")
+                run.hung_seeds.add(seed_path)
+            if anytime is not None:
+                anytime["seeds_replayed"] += 1
+            if errors and job.get("discard_errors"):
+                continue
+
+            campaign.update(
+                job["run"],
+                time_val,
+                seed_path,
+                bugs_reached=bugs_reached,
+                bugs_triggered=bugs_triggered,
+                Crash=job["Crash"],
+            )
+            if job["Crash"] and not bugs_triggered:
+                log_message(f"Appending ungrouped crash: {seed_path}")
+                progress.ungrouped_crashes += 1
+
+        if checkpoint and time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+            checkpoint()
+            last_checkpoint = time.monotonic()
+
+    futures = {}
+    # Sized for the largest share the analyzer can get, threads are only
+    # started for replays that are in flight
+    with ThreadPoolExecutor(
+        max_workers=max(num_workers, os.cpu_count() or 1)
+    ) as executor:
+        for index, job in enumerate(jobs):
+            if not isinstance(jobs, list):
+                progress.add(job)
+            if time.monotonic() - last_cpu_check >= CPU_CHECK_INTERVAL:
+                last_cpu_check = time.monotonic()
+                workers = get_replay_workers()
+                if workers != num_workers:
+                    log_message(f"CPU share changed, replaying on {workers} CPUs")
+                    num_workers = workers
+            while len(futures) >= min(num_workers, memory_limit):
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            if anytime is not None:
+                if deadline is not None and time.time() >= deadline:
+                    anytime["seeds_remaining"] += len(jobs) - index
+                    log_message("Deadline reached, not replaying the remaining seeds.")
+                    break
+                if not campaign.can_improve(job["run"], job["time_val"], job["Crash"]):
+                    if job.get("scratch"):
+                        os.remove(job.get("seed_file") or job["seed_path"])
+                    anytime["seeds_skipped"] += 1
+                    progress.complete(job)
+                    continue
+
+            # Crash seeds are the witnesses of their bugs, on demand their full
+            # output is kept and they bypass the cache to produce it
+            log_path = None
+            cache = replay_cache
+            if witness_dir is not None and job["Crash"]:
+                log_path = os.path.join(
+                    witness_dir, job["run"], f"{os.path.basename(job['seed_path'])}.log"
+                )
+                cache = None
+
+            env = job.get("env")
+            cache_context = job.get("cache_context", "")
+            if exit_on_trigger and job["Crash"]:
+                env = {**(env or {}), EXIT_ON_TRIGGER_ENV: "1"}
+                cache_context = f"{cache_context}:{EXIT_ON_TRIGGER_ENV}"
+
+            future = executor.submit(
+                replay_seed,
+                job["command"],
+                job["seed_path"],
+                job["time_val"],
+                job["Crash"],
+                backend_command=job.get("backend_command"),
+                env=env,
+                cache=cache,
+                cache_context=cache_context,
+                seed_file=job.get("seed_file"),
+                timeout=replay_timeout,
+                quiet_command=job.get("quiet_command"),
+                log_path=log_path,
+                cwd=job.get("cwd"),
+            )
+            futures[future] = job
+
+        collect(as_completed(list(futures)))
+
+    return execution_times
+
+
+# Replays run one per CPU the analyzer may run on. Unpinned one CPU is left
+# to the rest of the host, a cpuset share given by the fuzz manager is used
+# in full. The share can change while the analyzer runs.
+def get_replay_workers():
+    num_cores = os.cpu_count() or 1
+    try:
+        allowed = len(os.sched_getaffinity(0))
+    except AttributeError:
+        allowed = num_cores
+    if allowed < num_cores:
+        return allowed
+    return max(1, num_cores - 1)
+
+
+# MemAvailable of /proc/meminfo in KiB, None where it cannot be read
+def get_available_memory():
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# Number of replays that fit into the memory budget at the given peak RSS
+def memory_limited_replays(available_memory, peak_rss):
+    if available_memory is None or peak_rss <= 0:
+        return sys.maxsize
+    return max(1, int(available_memory * MEMORY_BUDGET // peak_rss))
 
 
 # Get benchmark information from the result directory
@@ -249,26 +324,79 @@ def get_bench_info(result_dir):
     return result
 
 
-# Run seed to get time and reached/triggered info
-def run_command(command, seed_path, time_val, Crash):
-    start = time.time()
-    result = subprocess.run(command, shell=True, text=True, capture_output=True)
-    end = time.time()
-    elapsed = end - start
+# Outcomes of a single replay and how often a seed is tried again after each.
+# A timeout is retried once with twice the time, since a loaded machine can
+# push a slow seed over the limit.
+REPLAY_OUTCOMES = ("ok", "timeout", "emulator_error", "not_read_to_end")
+RETRY_POLICY = {"timeout": 1}
+
+
+# Event channel
+#
+# A backend whose runtime supports it writes compact records to the file
+# descriptor named by FRB_EVENT_FD instead of relying on its console output: a
+# hello record "H frb1" once initialised, then "R <bug_id>" and "T <bug_id>" for
+# the first report of each reached and triggered bug. The first replay of a
+# backend captures both, once the hello record was seen its seeds are replayed
+# without the console output. Backends that never send it are parsed from
+# stdout as before.
+EVENT_FD_ENV = "FRB_EVENT_FD"
+EVENT_HELLO = "frb1"
+
+# Ends a replay right after its first triggered bug, later ones are only needed
+# to detect seeds that trigger several bugs
+EXIT_ON_TRIGGER_ENV = "FRB_EXIT_ON_TRIGGER"
+
+_event_support = {}
 
+
+# Parse the records of the event channel into (hello, triggered, reached),
+# with the same rules as the console output
+def parse_events(data):
+    hello = False
+    bugs_triggered = []
+    bugs_reached = []
+    for line in data.splitlines():
+        kind, _, value = line.partition(" ")
+        value = value.strip()
+        if kind == "H" and value == EVENT_HELLO:
+            hello = True
+        elif kind == "R" and not bugs_triggered:
+            if value not in bugs_reached:
+                bugs_reached.append(value)
+        elif kind == "T":
+            if value not in bugs_triggered:
+                bugs_triggered.append(value)
+    return hello, bugs_triggered, bugs_reached
+
+
+# Parse REACHED/TRIGGERED events from the output of a single replay. With
+# events from the event channel, the output is only checked for errors. A
+# replay that exited on its first trigger did not read its input to the end.
+def parse_replay_output(
+    stdout_lines,
+    stderr,
+    seed_path,
+    Crash,
+    timed_out=False,
+    events=None,
+    exit_on_trigger=False,
+):
     bugs_triggered = []
     bugs_reached = []
     errors = []
+    outcome = "ok"
     triggered_found = False
+    if events is not None:
+        bugs_triggered, bugs_reached = events
+        triggered_found = True
 
-    # output = result.stdout + "\n" + result.stderr
-    # print(output)
-    for line in result.stdout.splitlines():
+    for line in stdout_lines:
         if not triggered_found and "REACHED:" in line:
             bug_id = line.split(":", 1)[1].strip()
             if bug_id not in bugs_reached:
                 bugs_reached.append(bug_id)
-        if "TRIGGERED:" in line:
+        if events is None and "TRIGGERED:" in line:
             triggered_found = True
             bug_id = line.split(":", 1)[1].strip()
             if bug_id not in bugs_triggered:
@@ -276,8 +404,276 @@ def run_command(command, seed_path, time_val, Crash):
         if Crash:
             if "SYSCTL_AIRCR" in line:
                 errors.append(seed_path)
-            if "input file not read until end" in result.stderr:
-                # print(f"Warning: {seed_path} was not read until the end.")
-                errors.append(seed_path)
+                outcome = "emulator_error"
+    stopped_early = exit_on_trigger and bugs_triggered
+    if Crash and not stopped_early and "input file not read until end" in stderr:
+        # print(f"Warning: {seed_path} was not read until the end.")
+        errors.append(seed_path)
+        if outcome == "ok":
+            outcome = "not_read_to_end"
+    # Events seen before the hang are kept, they did happen
+    if timed_out:
+        outcome = "timeout"
+
+    return bugs_triggered, bugs_reached, errors, outcome
+
+
+# Replays run in their own session so a hung emulator is killed together with
+# everything it started
+def kill_process_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+# Full output of a witness seed, kept on demand next to the report
+def write_witness_log(log_path, stdout, stderr):
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "w") as f:
+        f.write(stdout)
+        if stderr:
+            f.write("\n---- stderr ----\n")
+            f.write(stderr)
+
+
+# Popen whose wait reaps the process with os.wait4 and keeps the resource
+# usage of the process and the descendants it waited for in rusage.
+# communicate() waits through it.
+class UsagePopen(subprocess.Popen):
+    rusage = None
+
+    def wait(self, timeout=None):
+        if self.returncode is not None:
+            return self.returncode
+        if timeout is None:
+            _, status, rusage = os.wait4(self.pid, 0)
+        else:
+            endtime = time.monotonic() + timeout
+            while True:
+                pid, status, rusage = os.wait4(self.pid, os.WNOHANG)
+                if pid == self.pid:
+                    break
+                remaining = endtime - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                time.sleep(min(remaining, 0.005))
+        self.rusage = rusage
+        self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+
+# Peak RSS of the analyzer in KiB, the floor of the max RSS of its replays
+def get_analyzer_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# Per-seed resource usage of a replay, ru_maxrss is in KiB on Linux. Linux
+# carries the peak RSS of the image a process was spawned from across exec,
+# so ru_maxrss never reads below the peak RSS of the analyzer when the replay
+# started. max_rss_kib is only the replay's own peak when it rose above that
+# floor, and None when the replay stayed below it.
+def get_replay_usage(rusage, analyzer_rss=0):
+    if rusage is None:
+        return None
+    return {
+        "cpu_user_s": round(rusage.ru_utime, 4),
+        "cpu_system_s": round(rusage.ru_stime, 4),
+        "max_rss_kib": (
+            rusage.ru_maxrss if rusage.ru_maxrss > analyzer_rss else None
+        ),
+        "minor_faults": rusage.ru_minflt,
+        "major_faults": rusage.ru_majflt,
+    }
+
+
+# Run seed to get time and reached/triggered info. With an event_key the
+# replay opens the event channel, once the backend of that key is known to
+# support it, queue seeds run quiet_command and their output is discarded.
+# Crash seeds keep their output for the error checks, log_path captures it.
+def run_command(
+    command,
+    seed_path,
+    time_val,
+    Crash,
+    env=None,
+    timeout=None,
+    quiet_command=None,
+    event_key=None,
+    log_path=None,
+    cwd=None,
+):
+    output = subprocess.PIPE
+    event_file = None
+    exit_on_trigger = (env or {}).get(EXIT_ON_TRIGGER_ENV, "0") not in ("", "0")
+    if event_key is not None and _event_support.get(event_key) is not False:
+        event_file = tempfile.TemporaryFile()
+        env = {**(env or {}), EVENT_FD_ENV: str(event_file.fileno())}
+        if _event_support.get(event_key) and not Crash and log_path is None:
+            output = subprocess.DEVNULL
+            command = quiet_command or command
+
+    # Commands given as argument lists are executed directly, without a shell
+    shell = isinstance(command, str)
+    if env is not None:
+        env = {**os.environ, **env}
+    start = time.time()
+    proc = UsagePopen(
+        command,
+        shell=shell,
+        text=True,
+        stdout=output,
+        stderr=output,
+        env=env,
+        cwd=cwd,
+        start_new_session=True,
+        pass_fds=(event_file.fileno(),) if event_file else (),
+    )
+    # Taken once the replay was exec'd, the floor it inherited is not higher
+    analyzer_rss = get_analyzer_rss()
+    timed_out = False
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        kill_process_group(proc)
+        stdout, stderr = proc.communicate()
+    end = time.time()
+    elapsed = end - start
+    stdout = stdout or ""
+    stderr = stderr or ""
+
+    events = None
+    if event_file is not None:
+        with event_file:
+            event_file.seek(0)
+            data = event_file.read().decode(errors="replace")
+        hello, bugs_triggered, bugs_reached = parse_events(data)
+        if hello or output is subprocess.DEVNULL:
+            events = (bugs_triggered, bugs_reached)
+        if event_key not in _event_support and not timed_out:
+            _event_support[event_key] = hello
+            if not hello:
+                log_message(
+                    "The event channel is not supported by this backend, "
+                    "parsing the replay output instead."
+                )
+
+    if log_path is not None:
+        write_witness_log(log_path, stdout, stderr)
+
+    # output = result.stdout + "\n" + result.stderr
+    # print(output)
+    bugs_triggered, bugs_reached, errors, outcome = parse_replay_output(
+        stdout.splitlines(),
+        stderr,
+        seed_path,
+        Crash,
+        timed_out=timed_out,
+        events=events,
+        exit_on_trigger=exit_on_trigger,
+    )
+
+    return (
+        seed_path,
+        bugs_triggered,
+        bugs_reached,
+        time_val,
+        elapsed,
+        errors,
+        outcome,
+        get_replay_usage(proc.rusage, analyzer_rss),
+    )
+
+
+# Key of a backend's event channel support, its replay command without the
+# seed
+def _backend_key(backend_command):
+    if isinstance(backend_command, str):
+        return backend_command
+    return tuple(backend_command)
+
+
+# Replay a seed in its own process. With a replay cache, seeds that were
+# already replayed in the same context are answered from the cache.
+# Replays are killed after timeout seconds and retried after the outcomes in
+# RETRY_POLICY, the number of attempts is added to the result, 0 for seeds
+# answered from the cache. With a log_path the full output of the seed is
+# written there. Replays run in cwd if given.
+def replay_seed(
+    command,
+    seed_path,
+    time_val,
+    Crash,
+    backend_command=None,
+    env=None,
+    cache=None,
+    cache_context="",
+    seed_file=None,
+    timeout=None,
+    quiet_command=None,
+    log_path=None,
+    cwd=None,
+):
+    seed_file = seed_file or seed_path
+    attempts = 0
+
+    def replay():
+        nonlocal attempts
+        while True:
+            attempts += 1
+            result = _replay_uncached(
+                command,
+                seed_path,
+                time_val,
+                Crash,
+                backend_command,
+                env,
+                timeout * 2 ** (attempts - 1) if timeout else None,
+                quiet_command,
+                log_path,
+                cwd,
+            )
+            outcome = result[6]
+            if attempts > RETRY_POLICY.get(outcome, 0):
+                return result
+
+    if cache is None:
+        result = replay()
+    else:
+        result = cache.replay(
+            replay, seed_path, time_val, Crash, cache_context, seed_file
+        )
+    return result + (attempts,)
+
+
+def _replay_uncached(
+    command,
+    seed_path,
+    time_val,
+    Crash,
+    backend_command,
+    env,
+    timeout,
+    quiet_command=None,
+    log_path=None,
+    cwd=None,
+):
+    # Replays of a backend share its event channel support
+    event_key = None
+    if backend_command is not None:
+        event_key = _backend_key(backend_command)
+
+    return run_command(
+        command,
+        seed_path,
+        time_val,
+        Crash,
+        env=env,
+        timeout=timeout,
+        quiet_command=quiet_command,
+        event_key=event_key,
+        log_path=log_path,
+        cwd=cwd,
+    )
 
-    return seed_path, bugs_triggered, bugs_reached, time_val, elapsed, errors
@@ -1,16 +1,9 @@
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-from firmrebugger.bug_analyzer_utils.common import (
-    update_bug_data,
-    run_command,
-    periodic_printer,
-)
-import re
+from firmrebugger.bug_analyzer_utils.seed_catalog import catalog_seeds, get_start_time
 
 
-def final_model(path="."):
+def final_model(path):
     max_num = None
     for name in os.listdir(path):
         folder_path = os.path.join(path, name)
@@ -21,28 +14,6 @@ def final_model(path="."):
     return max_num
 
 
-def get_time_input(seed_path, fuzzer_stats_path="default/fuzzer_stats"):
-    try:
-        file_mtime = int(os.path.getmtime(seed_path))
-    except Exception as e:
-        raise RuntimeError(f"Could not get mtime for {seed_path}: {e}")
-
-    try:
-        with open(fuzzer_stats_path, "r") as f:
-            for line in f:
-                if line.startswith("start_time"):
-                    match = re.search(r"\d+", line)
-                    if match:
-                        start_time = int(match.group())
-                        break
-            else:
-                raise RuntimeError(f"start_time not found in {fuzzer_stats_path}")
-    except Exception as e:
-        raise RuntimeError(f"Could not read {fuzzer_stats_path}: {e}")
-
-    return file_mtime - start_time
-
-
 def get_run_parameters(output_path):
     file_info = ""
     file_return = []
@@ -70,83 +41,34 @@ def get_run_parameters(output_path):
 def dice_analyzer(
     bench_info,
     output_path,
-    run_data=None,
-    Crash=False,
-    run_name=None,
     descriptor_path=None,
+    replay_cache=None,
 ):
     os.environ["FIRMREBUGGER_CONFIG"] = descriptor_path
-    execution_times = []
-    if not Crash:
-        working_folder = os.path.join(output_path, "default", "queue")
-        if not os.path.isdir(working_folder):
-            raise FileNotFoundError(
-                f"The 'Queue' folder does not exist at: {working_folder}"
-            )
-    else:
-        working_folder = os.path.join(output_path, "default", "crashes")
-        if not os.path.isdir(working_folder):
-            raise FileNotFoundError(
-                f"The 'Crashes' folder does not exist at: {working_folder}"
-            )
-
-    seeds = [
-        os.path.join(working_folder, seed)
-        for seed in sorted(os.listdir(working_folder))
-        if "README" not in seed and os.path.basename(seed).startswith("id")
-    ]
-    num_cores = os.cpu_count()
-    num_workers = max(1, int(num_cores) - 1)
-
-    progress = {
-        "completed": 0,
-        "total": len(seeds),
-        "run_name": run_name,
-        "ungrouped_crashes": 0,
-        "Fuzzer": bench_info["fuzzer"],
-        "Target": bench_info["target"],
-    }
-    stop_event = threading.Event()
-
-    printer_thread = threading.Thread(
-        target=periodic_printer, args=(run_data, stop_event, progress, Crash)
-    )
-    printer_thread.start()
-    original_dir = os.getcwd()
-
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = []
-        # change dir
-        os.chdir(output_path)
-        model = final_model()
-        for seed_path in seeds:
-            command = f"stdbuf -oL -eL ./run_fw.py {model} {seed_path}"
-            futures.append(
-                executor.submit(
-                    run_command, command, seed_path, get_time_input(seed_path), Crash
-                )
-            )
-
-        for future in as_completed(futures):
-            result = future.result()
-            if result is None:
-                continue
-            seed_path, bugs_triggered, bugs_reached, time_val, elapsed, errors = result
-            execution_times.append(elapsed)
-
-            run_data = update_bug_data(
-                run_data,
-                time_val,
-                seed_path,
-                bugs_triggered=bugs_triggered,
-                bugs_reached=bugs_reached,
-                Crash=Crash,
-            )
-
-            progress["completed"] += 1
-            progress["ungrouped_crashes"] = len(run_data[0]["ungrouped_crashes"])
-
-    stop_event.set()
-    printer_thread.join()
-    os.chdir(original_dir)
-    return run_data, execution_times
+    seeds = catalog_seeds(os.path.join(output_path, "default"), with_mtime=True)
+    start_time = get_start_time(os.path.join(output_path, "default", "fuzzer_stats"))
+
+    output_path = os.path.abspath(output_path)
+    model = final_model(output_path)
+    # The peripheral model is learned per trial, so results are only
+    # reused within the same trial
+    cache_context = f"{output_path}:{model}"
+    run_fw = os.path.join(output_path, "run_fw.py")
+
+    jobs = []
+    for seed in seeds:
+        command = ["stdbuf", "-oL", "-eL", run_fw, str(model), seed.path]
+        jobs.append(
+            {
+                "command": command,
+                "seed_path": seed.path,
+                "time_val": int(seed.mtime) - start_time,
+                "Crash": seed.Crash,
+                "backend_command": command[:-1],
+                "cache_context": cache_context,
+                # run_fw.py finds the models of the trial relative to it
+                "cwd": output_path,
+            }
+        )
+
+    return jobs
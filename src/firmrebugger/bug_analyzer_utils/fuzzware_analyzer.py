@@ -2,14 +2,12 @@ import os
 import sys
 import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from firmrebugger.bug_analyzer_utils.common import (
-    update_bug_data,
-    run_command,
-    periodic_printer,
-)
-import threading
 from firmrebugger.common import get_working_dirs
+from firmrebugger.bug_analyzer_utils.common import get_replay_workers
+from firmrebugger.bug_analyzer_utils.instrumentation import phase
+from firmrebugger.bug_analyzer_utils.seed_catalog import read_fuzzer_stats
 import glob
+import json
 
 
 def get_time_data_fuzzware(crash_timing_path):
@@ -22,6 +20,16 @@ def get_time_data_fuzzware(crash_timing_path):
     return time_data
 
 
+# Seeds replay against the config of the main dir they were found in
+def get_replay_context(replay_cache, output_path, seed_path):
+    if replay_cache is None:
+        return ""
+    main_dir = seed_path.split(os.sep, 1)[0]
+    return replay_cache.context_digest(
+        os.path.join(output_path, main_dir, "config.yml")
+    )
+
+
 def replace_main_config(output_path):
     for main_dir in glob.glob(os.path.join(output_path, "main*")):
         config_path = os.path.join(main_dir, "config.yml")
@@ -36,33 +44,130 @@ def replace_main_config(output_path):
                 subprocess.run(["sed", "-i", "1s/^/# /", config_path])
 
 
+TIMINGS_MARKER = ".frb_timings"
+
+
+# Queue and crash dirs of every fuzzer instance in every main dir of a trial
+def get_fuzzware_seed_dirs(output):
+    seed_dirs = []
+    for main_dir in sorted(glob.glob(os.path.join(output, "main*"))):
+        for fuzzer_dir in sorted(glob.glob(os.path.join(main_dir, "fuzzers", "*"))):
+            for name, Crash in (("queue", False), ("crashes", True)):
+                seed_dir = os.path.join(fuzzer_dir, name)
+                if os.path.isdir(seed_dir):
+                    seed_dirs.append((seed_dir, Crash))
+    return seed_dirs
+
+
+# Directory mtimes change whenever seeds are added or removed
+def get_timings_fingerprint(output, seed_dirs):
+    return [
+        [os.path.relpath(seed_dir, output), os.stat(seed_dir).st_mtime_ns]
+        for seed_dir, _ in seed_dirs
+    ]
+
+
+def timings_are_fresh(output, seed_dirs):
+    stats_dir = os.path.join(output, "stats")
+    for name in (
+        TIMINGS_MARKER,
+        "input_creation_timings.txt",
+        "crash_creation_timings.txt",
+    ):
+        if not os.path.exists(os.path.join(stats_dir, name)):
+            return False
+    try:
+        with open(os.path.join(stats_dir, TIMINGS_MARKER), "r") as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return marker == get_timings_fingerprint(output, seed_dirs)
+
+
+# Fuzzing start of the trial, the earliest start_time of its fuzzer instances
+def get_fuzzware_start_time(output):
+    start_times = []
+    stats_pattern = os.path.join(output, "main*", "fuzzers", "*", "fuzzer_stats")
+    for stats_path in glob.glob(stats_pattern):
+        start_time = read_fuzzer_stats(stats_path).get("start_time")
+        if start_time is not None:
+            start_times.append(int(start_time))
+    return min(start_times) if start_times else None
+
+
+# Write the input/crash timing tables of `fuzzware genstats crashtimings`
+# with one scandir pass over each seed directory of the trial
+def extract_fuzzware_timings(output, seed_dirs):
+    start_time = get_fuzzware_start_time(output)
+    if start_time is None or not seed_dirs:
+        return False
+
+    timings = {False: [], True: []}
+    for seed_dir, Crash in seed_dirs:
+        with os.scandir(seed_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith("id") or not entry.is_file():
+                    continue
+                seed_time = max(0, int(entry.stat().st_mtime - start_time))
+                timings[Crash].append((seed_time, os.path.relpath(entry.path, output)))
+
+    stats_dir = os.path.join(output, "stats")
+    os.makedirs(stats_dir, exist_ok=True)
+    for Crash, file_name in (
+        (False, "input_creation_timings.txt"),
+        (True, "crash_creation_timings.txt"),
+    ):
+        with open(os.path.join(stats_dir, file_name), "w") as f:
+            for seed_time, seed_path in sorted(timings[Crash]):
+                f.write(f"{seed_time} {seed_path}\n")
+    return True
+
+
+def run_fuzzware_genstats(output):
+    command = ["fuzzware", "genstats", "crashtimings", "-p", f"{output}"]
+
+    try:
+        result = subprocess.run(
+            command,
+            check=True,
+            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.stderr:
+            print(f"Command error output for {output}:")
+            print(result.stderr)
+    except subprocess.CalledProcessError as e:
+        print(f"Error occurred while running fuzzware for {output}: {e.stderr}")
+        return False
+    return True
+
+
+# Generate the timing tables of every trial in the campaign. Trials whose
+# tables are still fresh are skipped, so only the first run pays for this.
+# The main configs of Fuzzware-Icicle are rewritten for the replays either way.
 def gen_fuzzware_stats(RESULT_DIR, fuzzer):
     def process_output_dir(output):
         if fuzzer == "Fuzzware-Icicle":
             replace_main_config(output)
 
-        command = ["fuzzware", "genstats", "crashtimings", "-p", f"{output}"]
+        seed_dirs = get_fuzzware_seed_dirs(output)
+        if timings_are_fresh(output, seed_dirs):
+            return True
 
-        try:
-            result = subprocess.run(
-                command,
-                check=True,
-                text=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            if result.stderr:
-                print(f"Command error output for {output}:")
-                print(result.stderr)
-        except subprocess.CalledProcessError as e:
-            print(f"Error occurred while running fuzzware for {output}: {e.stderr}")
-            return False
+        if not extract_fuzzware_timings(output, seed_dirs):
+            # Unknown layout, let fuzzware generate the tables
+            if not run_fuzzware_genstats(output):
+                return False
+
+        with open(os.path.join(output, "stats", TIMINGS_MARKER), "w") as f:
+            json.dump(get_timings_fingerprint(output, seed_dirs), f)
         return True
 
     output_dirs = get_working_dirs(RESULT_DIR)
 
     with ThreadPoolExecutor(
-        max_workers=min(len(output_dirs), os.cpu_count())
+        max_workers=min(len(output_dirs), get_replay_workers())
     ) as executor:
         future_to_output = {
             executor.submit(process_output_dir, output): output
@@ -90,13 +195,10 @@ def gen_fuzzware_stats(RESULT_DIR, fuzzer):
 def fuzzware_analyzer(
     bench_info,
     output_path,
-    run_data=None,
-    Crash=False,
-    run_name=None,
     descriptor_path=None,
+    replay_cache=None,
 ):
     os.environ["FIRMREBUGGER_CONFIG"] = descriptor_path
-    execution_times = []
     fuzzer = bench_info["fuzzer"]
     GHIDRA_SRC = os.environ.get("GHIDRA_SRC", None)
 
@@ -108,66 +210,35 @@ def fuzzware_analyzer(
             )
             sys.exit(1)
 
-    gen_fuzzware_stats(f"{output_path}/../", fuzzer)
+    with phase("timing_extraction"):
+        gen_fuzzware_stats(f"{output_path}/../", fuzzer)
     crash_timing_path = os.path.join(output_path, "stats", "crash_creation_timings.txt")
     input_timing_path = os.path.join(output_path, "stats", "input_creation_timings.txt")
 
     if not os.path.exists(crash_timing_path) or not os.path.exists(input_timing_path):
         print(f"Timing files not found in {output_path}.")
         sys.exit(1)
-    if Crash:
-        seed_info = get_time_data_fuzzware(crash_timing_path)
-    else:
-        seed_info = get_time_data_fuzzware(input_timing_path)
-
-    num_cores = os.cpu_count()
-    num_workers = max(1, int(num_cores) - 1)
-
-    progress = {
-        "completed": 0,
-        "total": len(seed_info),
-        "run_name": run_name,
-        "ungrouped_crashes": 0,
-        "Fuzzer": bench_info["fuzzer"],
-        "Target": bench_info["target"],
-    }
-    stop_event = threading.Event()
-
-    printer_thread = threading.Thread(
-        target=periodic_printer, args=(run_data, stop_event, progress, Crash)
-    )
-    printer_thread.start()
 
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = []
-        for time_val, seed_path in seed_info:
+    jobs = []
+    for timing_path, Crash in ((input_timing_path, False), (crash_timing_path, True)):
+        for time_val, seed_path in get_time_data_fuzzware(timing_path):
             full_seed_path = os.path.join(output_path, seed_path)
-            command = f"fuzzware replay -v {full_seed_path}"
-            futures.append(
-                executor.submit(run_command, command, seed_path, time_val, Crash)
-            )
-
-        for future in as_completed(futures):
-            result = future.result()
-            if result is None:
-                continue
-            seed_path, bugs_triggered, bugs_reached, time_val, elapsed, errors = result
-            execution_times.append(elapsed)
-            if errors:
-                continue
-
-            run_data = update_bug_data(
-                run_data,
-                time_val,
-                seed_path,
-                bugs_triggered=bugs_triggered,
-                bugs_reached=bugs_reached,
-                Crash=Crash,
+            command = ["fuzzware", "replay", "-v", full_seed_path]
+            jobs.append(
+                {
+                    "command": command,
+                    "seed_path": seed_path,
+                    "time_val": time_val,
+                    "Crash": Crash,
+                    "backend_command": command[:-1],
+                    "cache_context": get_replay_context(
+                        replay_cache, output_path, seed_path
+                    ),
+                    "seed_file": full_seed_path,
+                    "discard_errors": True,
+                    # Without -v once events arrive over the event channel
+                    "quiet_command": ["fuzzware", "replay", full_seed_path],
+                }
             )
-            progress["completed"] += 1
-            progress["ungrouped_crashes"] = len(run_data[0]["ungrouped_crashes"])
-
-    stop_event.set()
-    printer_thread.join()
 
-    return run_data, execution_times
+    return jobs
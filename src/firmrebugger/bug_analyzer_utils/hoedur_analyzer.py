@@ -1,17 +1,14 @@
+import io
 import os
 import sys
+import contextlib
 import zstandard
 import tarfile
 import yaml
-import io
 import glob
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from firmrebugger.bug_analyzer_utils.common import (
-    update_bug_data,
-    run_command,
-    periodic_printer,
-)
-import threading
+import shutil
+from firmrebugger.bug_analyzer_utils.common import create_scratch_dir
+from firmrebugger.bug_analyzer_utils.instrumentation import timed_iter
 
 
 def get_hoedur_env():
@@ -23,17 +20,6 @@ def get_hoedur_env():
     return hoedur_env
 
 
-def get_timestamp_from_tar(tar_bytes):
-    with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
-        for member in tar.getmembers():
-            if member.name.endswith("meta.yml"):
-                f = tar.extractfile(member)
-                if f is not None:
-                    meta_data = yaml.safe_load(f.read().decode())
-                    return meta_data.get("timestamp")
-    return None
-
-
 def get_corpus_tar_zst(path):
     pattern = os.path.join(path, "output*.corpus.tar.zst")
     try:
@@ -45,44 +31,101 @@ def get_corpus_tar_zst(path):
     return glob.glob(pattern)[0]
 
 
-def get_seeds(zst_path):
-    queue = []
-    crashes = []
-    meta_time = None
+CONFIG_ARCHIVE_NAME = "frb_hoedur_config.tar.zst"
+
+
+def is_seed_member(name):
+    return name.startswith("input/") or name.startswith("crash/")
 
-    tmp_dir = os.path.join(os.path.dirname(zst_path), "tmp")
-    os.makedirs(tmp_dir, exist_ok=True)
 
-    with open(zst_path, "rb") as compressed:
+# The config and metadata of a corpus archive, everything but the seeds, as a
+# small archive that replays can import instead. It is written while the
+# seeds are streamed and rebuilt only when the corpus archive is newer.
+def get_config_archive_path(zst_path):
+    return os.path.join(os.path.dirname(zst_path), CONFIG_ARCHIVE_NAME)
+
+
+def config_archive_is_fresh(zst_path):
+    config_path = get_config_archive_path(zst_path)
+    return os.path.exists(config_path) and os.path.getmtime(
+        config_path
+    ) >= os.path.getmtime(zst_path)
+
+
+# Walk the corpus archive once as a stream without buffering it. Seeds are
+# written to scratch_dir as their members arrive and yielded as
+# (member_name, seed_path, relative_time, Crash). Seeds stored before meta.yml
+# are held back until its timestamp is known. With a config_path, every other
+# member is copied into the config archive, which is put in place when the
+# stream ends. The seeds are held back until then, so no replay imports an
+# incomplete config.
+def iter_seeds(zst_path, scratch_dir, config_path=None):
+    meta_time = None
+    pending = []
+    hold = config_path is not None
+
+    with contextlib.ExitStack() as config_stack, open(zst_path, "rb") as compressed:
+        config_tar = None
+        if config_path is not None:
+            tmp_path = f"{config_path}.tmp"
+            out = config_stack.enter_context(open(tmp_path, "wb"))
+            writer = config_stack.enter_context(
+                zstandard.ZstdCompressor().stream_writer(out)
+            )
+            config_tar = config_stack.enter_context(
+                tarfile.open(fileobj=writer, mode="w|")
+            )
+
         dctx = zstandard.ZstdDecompressor()
-        decompressed = dctx.stream_reader(compressed)
-        tar_bytes = decompressed.read()
-
-    with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
-        for member in tar.getmembers():
-            if "meta.yml" in member.name:
-                meta_time = get_timestamp_from_tar(tar_bytes)
-                break
-
-    with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
-        for member in tar.getmembers():
-            if not member.isfile():
-                continue
-            if meta_time is None:
-                print("Meta timestamp not found in the tar file.")
-                sys.exit(1)
-            if member.name.startswith("input/") or member.name.startswith("crash/"):
-                relative_time = member.mtime - meta_time
-                # Ensure the directories exist
-                extract_path = os.path.join(tmp_dir, member.name)
-                os.makedirs(os.path.dirname(extract_path), exist_ok=True)
-                with tar.extractfile(member) as src, open(extract_path, "wb") as dst:
-                    dst.write(src.read())
-                if member.name.startswith("input/"):
-                    queue.append((extract_path, relative_time))
-                elif member.name.startswith("crash/"):
-                    crashes.append((extract_path, relative_time))
-    return queue, crashes
+        with dctx.stream_reader(compressed) as decompressed, tarfile.open(
+            fileobj=decompressed, mode="r|"
+        ) as tar:
+            for member in tar:
+                if not is_seed_member(member.name):
+                    # Small members, read once for the config and meta.yml
+                    data = tar.extractfile(member).read() if member.isfile() else None
+                    if config_tar is not None:
+                        config_tar.addfile(
+                            member, io.BytesIO(data) if data is not None else None
+                        )
+                    if data is None or not member.name.endswith("meta.yml"):
+                        continue
+                    meta_data = yaml.safe_load(data.decode())
+                    meta_time = meta_data.get("timestamp")
+                    if meta_time is None:
+                        break
+                    if not hold:
+                        for name, seed_path, mtime, Crash in pending:
+                            yield name, seed_path, mtime - meta_time, Crash
+                        pending = []
+                    continue
+
+                if not member.isfile():
+                    continue
+                Crash = member.name.startswith("crash/")
+
+                seed_path = os.path.join(scratch_dir, member.name)
+                os.makedirs(os.path.dirname(seed_path), exist_ok=True)
+                with tar.extractfile(member) as src, open(seed_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+
+                if meta_time is None or hold:
+                    pending.append((member.name, seed_path, member.mtime, Crash))
+                else:
+                    yield member.name, seed_path, member.mtime - meta_time, Crash
+
+        if config_tar is not None and meta_time is not None:
+            config_stack.close()
+            os.replace(tmp_path, config_path)
+
+    if meta_time is None:
+        if config_path is not None:
+            os.remove(tmp_path)
+        print("Meta timestamp not found in the tar file.")
+        sys.exit(1)
+
+    for name, seed_path, mtime, Crash in pending:
+        yield name, seed_path, mtime - meta_time, Crash
 
 
 def check_env_setup():
@@ -101,77 +144,58 @@ def check_env_setup():
         sys.exit(1)
 
 
+# The cache context is the digest of the config archive, taken once the
+# stream has written it
+def iter_jobs(corpus_path, config_path, scratch_dir, replay_cache, build_config):
+    cache_context = None
+    for name, seed_file, time_val, Crash in iter_seeds(
+        corpus_path, scratch_dir, config_path if build_config else None
+    ):
+        if "README" in name:
+            os.remove(seed_file)
+            continue
+        if cache_context is None:
+            cache_context = (
+                replay_cache.context_digest(config_path) if replay_cache else ""
+            )
+        command = [
+            "hoedur-dict-arm",
+            "--import-config",
+            config_path,
+            "run",
+            seed_file,
+        ]
+        yield {
+            "command": command,
+            # Scratch copies are removed after replay, report the archive member
+            "seed_path": os.path.join(corpus_path, name),
+            "time_val": time_val,
+            "Crash": Crash,
+            "backend_command": command[:-1],
+            "cache_context": cache_context,
+            "seed_file": seed_file,
+            "scratch": True,
+        }
+
+
 def hoedur_analyzer(
     bench_info,
     output_path,
-    run_data=None,
-    Crash=False,
-    run_name=None,
     descriptor_path=None,
+    replay_cache=None,
 ):
     # Set bug descriptor path
     os.environ["FIRMREBUGGER_CONFIG"] = descriptor_path
     os.environ["LD_LIBRARY_PATH"] = os.path.expanduser("~/.cargo/bin/")
-    execution_times = []
 
     check_env_setup()
     corpus_path = get_corpus_tar_zst(output_path)
-    if Crash:
-        working_folder = get_seeds(corpus_path)[1]
-    else:
-        working_folder = get_seeds(corpus_path)[0]
-    num_cores = os.cpu_count()
-    num_workers = max(1, int(num_cores) - 1)
-
-    progress = {
-        "completed": 0,
-        "total": len(working_folder),
-        "run_name": run_name,
-        "ungrouped_crashes": 0,
-        "Fuzzer": bench_info["fuzzer"],
-        "Target": bench_info["target"],
-    }
-
-    stop_event = threading.Event()
-    printer_thread = threading.Thread(
-        target=periodic_printer, args=(run_data, stop_event, progress, Crash)
+    config_path = get_config_archive_path(corpus_path)
+    build_config = not config_archive_is_fresh(corpus_path)
+    scratch_dir = create_scratch_dir(output_path)
+
+    # Seeds are replayed while the archive is still being read
+    return timed_iter(
+        iter_jobs(corpus_path, config_path, scratch_dir, replay_cache, build_config),
+        "archive_extraction",
     )
-    printer_thread.start()
-
-    # Begin bug analysis on seeds
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = []
-        hoedur_base_dir = get_hoedur_env()
-        for seed, time_val in sorted(working_folder):
-            seed_path = os.path.abspath(seed)
-            if "README" in seed_path:
-                continue
-            command = f"hoedur-dict-arm --import-config {corpus_path} run {seed_path}"
-            futures.append(
-                executor.submit(run_command, command, seed_path, time_val, Crash)
-            )
-
-        for future in as_completed(futures):
-            result = future.result()
-            if result is None:
-                continue
-            seed_path, bugs_triggered, bugs_reached, time_val, elapsed, errors = result
-            execution_times.append(elapsed)
-
-            run_data = update_bug_data(
-                run_data,
-                time_val,
-                seed_path,
-                bugs_triggered=bugs_triggered,
-                bugs_reached=bugs_reached,
-                Crash=Crash,
-            )
-
-            progress["completed"] += 1
-            progress["ungrouped_crashes"] = len(run_data[0]["ungrouped_crashes"])
-
-    stop_event.set()
-    printer_thread.join()
-    # shutil.rmtree(os.path.join(os.path.dirname(corpus_path), "tmp"))
-
-    return run_data, execution_times
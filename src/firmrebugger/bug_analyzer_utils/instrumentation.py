@@ -0,0 +1,253 @@
+import os
+import json
+import math
+import time
+import heapq
+import threading
+from contextlib import contextmanager
+
+# Seeds listed in the slowest seeds of the report
+SLOWEST_SEEDS = 10
+
+# One line with the latency and resource usage of every replayed seed
+USAGE_FILE_NAME = "frb_replay_usage.jsonl"
+
+# Upper bounds in seconds of the replay latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+_active = None
+
+
+# Time a nested phase of the running analysis, e.g. the timing extraction of
+# an analyzer. Does nothing outside of an analysis.
+@contextmanager
+def phase(name):
+    instrumentation = _active
+    if instrumentation is None:
+        yield
+    else:
+        with instrumentation.phase(name):
+            yield
+
+
+# Charge the time spent producing each item of a lazy job source to a phase,
+# so archive extraction of streamed seeds is not counted as replay time
+def timed_iter(iterable, name):
+    iterator = iter(iterable)
+    while True:
+        with phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _now():
+    times = os.times()
+    return (
+        time.perf_counter(),
+        times.user + times.system,
+        times.children_user + times.children_system,
+    )
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Nearest rank
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(values):
+    values = sorted(values)
+    histogram = {str(bound): 0 for bound in LATENCY_BUCKETS}
+    histogram["inf"] = 0
+    for value in values:
+        for bound in LATENCY_BUCKETS:
+            if value <= bound:
+                histogram[str(bound)] += 1
+                break
+        else:
+            histogram["inf"] += 1
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3) if values else None,
+        "p50": _round(percentile(values, 0.50)),
+        "p95": _round(percentile(values, 0.95)),
+        "p99": _round(percentile(values, 0.99)),
+        "max": _round(values[-1] if values else None),
+        "histogram": histogram,
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+# Resource usage of the seeds replayed in their own process. The RSS is only
+# known for replays that peaked above the analyzer.
+def usage_summary(usages):
+    rss = sorted(
+        usage["max_rss_kib"] for usage in usages if usage["max_rss_kib"] is not None
+    )
+    cpu_user = sum(usage["cpu_user_s"] for usage in usages)
+    cpu_system = sum(usage["cpu_system_s"] for usage in usages)
+    return {
+        "count": len(usages),
+        "cpu_user_s": round(cpu_user, 3),
+        "cpu_system_s": round(cpu_system, 3),
+        "cpu_per_seed_s": (
+            round((cpu_user + cpu_system) / len(usages), 4) if usages else None
+        ),
+        "max_rss_kib": rss[-1] if rss else None,
+        "p95_rss_kib": percentile(rss, 0.95),
+        "minor_faults": sum(usage["minor_faults"] for usage in usages),
+        "major_faults": sum(usage["major_faults"] for usage in usages),
+    }
+
+
+# Where the time of a bug analysis went. The analysis is always in one top
+# level phase, analyzers nest their own phases into it. Time is charged to the
+# innermost phase only, with the wall time, the CPU time of the analyzer
+# process and the CPU time of the replays reaped in that time. Phases are
+# only tracked on the thread that started the instrumentation. Replay
+# latencies are kept per run and kind of seed, seeds answered from the replay
+# cache are only counted. The rusage of seeds replayed in their own process
+# is aggregated per run, with a usage_path every replayed seed is also
+# written there.
+class AnalysisInstrumentation:
+    def __init__(self, slowest=SLOWEST_SEEDS, usage_path=None):
+        self.phases = {}
+        self.latencies = {}
+        self.usages = {}
+        self.usage_path = usage_path
+        self._usage_file = None
+        self.cached = {}
+        self.slowest = []
+        self.num_slowest = slowest
+        self._stack = []
+        self._mark = None
+        self._owner = None
+        self._start = None
+        self._end = None
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        global _active
+        self._owner = threading.get_ident()
+        self._start = time.perf_counter()
+        self._mark = _now()
+        self._stack = [name]
+        if self.usage_path:
+            self._usage_file = open(self.usage_path, "w")
+        _active = self
+
+    def stop(self):
+        global _active
+        self._charge()
+        self._stack = []
+        self._end = time.perf_counter()
+        if self._usage_file is not None:
+            self._usage_file.close()
+            self._usage_file = None
+        _active = None
+
+    def _charge(self):
+        now = _now()
+        if self._stack:
+            entry = self.phases.setdefault(
+                self._stack[-1], {"wall_s": 0.0, "cpu_s": 0.0, "replay_cpu_s": 0.0}
+            )
+            entry["wall_s"] += now[0] - self._mark[0]
+            entry["cpu_s"] += now[1] - self._mark[1]
+            entry["replay_cpu_s"] += now[2] - self._mark[2]
+        self._mark = now
+
+    # Move the analysis on to the next top level phase
+    def switch(self, name):
+        self._charge()
+        self._stack[:] = [name]
+
+    @contextmanager
+    def phase(self, name):
+        if threading.get_ident() != self._owner or not self._stack:
+            yield
+            return
+        self._charge()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._charge()
+            self._stack.pop()
+
+    def record(self, job, elapsed, outcome, cached=False, usage=None):
+        kind = "crashes" if job["Crash"] else "queue"
+        with self._lock:
+            if cached:
+                run_cached = self.cached.setdefault(job["run"], {})
+                run_cached[kind] = run_cached.get(kind, 0) + 1
+                return
+            self.latencies.setdefault(job["run"], {}).setdefault(kind, []).append(
+                elapsed
+            )
+            entry = (elapsed, job["seed_path"], job["run"], kind, outcome)
+            if len(self.slowest) < self.num_slowest:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+            if usage is not None:
+                self.usages.setdefault(job["run"], []).append(usage)
+            if self._usage_file is not None:
+                line = {
+                    "run": job["run"],
+                    "seed_path": job["seed_path"],
+                    "kind": kind,
+                    "elapsed": round(elapsed, 4),
+                    "outcome": outcome,
+                    "usage": usage,
+                }
+                self._usage_file.write(json.dumps(line) + "\n")
+
+    def to_report(self):
+        latency = {}
+        totals = {}
+        for run_name, kinds in sorted(self.latencies.items()):
+            latency[run_name] = {}
+            for kind, values in sorted(kinds.items()):
+                latency[run_name][kind] = latency_summary(values)
+                totals.setdefault(kind, []).extend(values)
+        latency["all"] = {
+            kind: latency_summary(values) for kind, values in sorted(totals.items())
+        }
+        resources = {
+            run_name: usage_summary(usages)
+            for run_name, usages in sorted(self.usages.items())
+        }
+        resources["all"] = usage_summary(
+            [usage for usages in self.usages.values() for usage in usages]
+        )
+        return {
+            "total_wall_s": round((self._end or time.perf_counter()) - self._start, 3),
+            "phases": {
+                name: {key: round(value, 3) for key, value in entry.items()}
+                for name, entry in self.phases.items()
+            },
+            "latency": latency,
+            "resources": resources,
+            "cached_seeds": self.cached,
+            "slowest_seeds": [
+                {
+                    "seed_path": seed_path,
+                    "run": run_name,
+                    "kind": kind,
+                    "elapsed": round(elapsed, 3),
+                    "outcome": outcome,
+                }
+                for elapsed, seed_path, run_name, kind, outcome in sorted(
+                    self.slowest, reverse=True
+                )
+            ],
+        }
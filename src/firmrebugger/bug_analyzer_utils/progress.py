@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+
+PROGRESS_FILE_NAME = "frb_progress.jsonl"
+TTY_INTERVAL = 1
+LOG_INTERVAL = 60
+STREAM_INTERVAL = 10
+
+_active = None
+
+
+# Print a message without tearing the progress lines of a running analysis
+def log_message(message):
+    progress = _active
+    if progress is None:
+        print(message)
+    else:
+        progress.log(message)
+
+
+# Block of status lines at the bottom of a terminal that is redrawn in place.
+# Only the lines that differ from what is on screen are rewritten, the cursor
+# always sits on the line below the block.
+class LiveLines:
+    def __init__(self):
+        self.lines = []
+
+    def draw(self, lines):
+        old = self.lines
+        out = []
+        if old:
+            out.append(f"\x1b[{len(old)}F")
+        for idx, line in enumerate(lines):
+            if idx < len(old) and old[idx] == line:
+                out.append("\n")
+            else:
+                out.append(f"\x1b[2K{line}\n")
+        extra = len(old) - len(lines)
+        if extra > 0:
+            out.append("\x1b[2K\n" * extra)
+            out.append(f"\x1b[{extra}F")
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
+        self.lines = lines
+
+    # Clear the block. below are lines printed under it since the last draw,
+    # e.g. the echo of a line typed into the terminal.
+    def erase(self, below=0):
+        if self.lines:
+            sys.stdout.write(f"\x1b[{len(self.lines) + below}F\x1b[J")
+            sys.stdout.flush()
+            self.lines = []
+
+
+# Lines cut to the terminal width, wrapped lines would break the redraw
+def fit_terminal(lines):
+    width = shutil.get_terminal_size().columns - 1
+    return [line[:width] for line in lines]
+
+
+# Progress of a bug analysis. Counters are updated by replay_seeds, a
+# background thread renders them. On a TTY only the lines that changed are
+# redrawn, otherwise a plain status line is printed every LOG_INTERVAL
+# seconds. Every STREAM_INTERVAL seconds a snapshot is appended to a JSONL
+# file that the fuzz manager tails.
+class AnalysisProgress:
+    def __init__(self, campaign, bench_info, stream_path=None):
+        self.campaign = campaign
+        self.fuzzer = bench_info["fuzzer"]
+        self.target = bench_info["target"]
+        self.stream_path = stream_path
+        self.tty = sys.stdout.isatty()
+
+        self.total = 0
+        self.completed = 0
+        self.queue_total = 0
+        self.queue_completed = 0
+        self.crash_total = 0
+        self.crash_completed = 0
+        self.ungrouped_crashes = 0
+        self.runs = {}
+        self.outcomes = {}
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._screen = LiveLines()
+        self._start_time = None
+        self._last_log = 0
+        self._last_stream = 0
+
+    def add(self, job):
+        self.total += 1
+        if job["Crash"]:
+            self.crash_total += 1
+        else:
+            self.queue_total += 1
+        self.runs.setdefault(job["run"], [0, 0])[1] += 1
+
+    def complete(self, job, outcome=None):
+        if outcome is not None:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.completed += 1
+        self.runs[job["run"]][0] += 1
+        if job["Crash"]:
+            self.crash_completed += 1
+        else:
+            self.queue_completed += 1
+
+    def start(self):
+        global _active
+        self._start_time = time.monotonic()
+        if self.stream_path:
+            open(self.stream_path, "w").close()
+        _active = self
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        global _active
+        self._stop_event.set()
+        self._thread.join()
+        _active = None
+        with self._lock:
+            self._screen.erase()
+            print(self._status_line())
+            sys.stdout.flush()
+        self._write_snapshot(done=True)
+
+    def log(self, message):
+        with self._lock:
+            self._screen.erase()
+            print(message)
+            if self.tty:
+                self._screen.draw(self._render())
+            sys.stdout.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(TTY_INTERVAL if self.tty else 1):
+            now = time.monotonic()
+            with self._lock:
+                if self.tty:
+                    self._screen.draw(self._render())
+                elif now - self._last_log >= LOG_INTERVAL:
+                    print(self._status_line())
+                    sys.stdout.flush()
+                    self._last_log = now
+            if now - self._last_stream >= STREAM_INTERVAL:
+                self._write_snapshot()
+                self._last_stream = now
+
+    def _rate(self):
+        elapsed = time.monotonic() - self._start_time
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def _status_line(self):
+        runs_done = sum(
+            1 for completed, total in self.runs.values() if completed == total
+        )
+        return (
+            f"[Progress] Completed: {self.completed}/{self.total} | "
+            f"Queue: {self.queue_completed}/{self.queue_total} | "
+            f"Crashes: {self.crash_completed}/{self.crash_total} | "
+            f"{self.fuzzer} | "
+            f"{self.target} | "
+            f"Runs: {runs_done}/{len(self.campaign.runs)} | "
+            f"{self._rate():.1f} seeds/s | "
+            f"Timeouts: {self.outcomes.get('timeout', 0)} | "
+            f"Total Ungrouped crashes: {self.ungrouped_crashes} |"
+        )
+
+    # Status line followed by the bug info of every run with seeds in flight
+    def _render(self):
+        lines = [self._status_line()]
+        for run_name, (completed, total) in list(self.runs.items()):
+            if completed == total:
+                continue
+            lines.append(f"---- {run_name} {completed}/{total} ----")
+            for bug in self.campaign.runs[run_name].bugs:
+                lines.append(
+                    f"Bug ID: {bug.bug_id}, Reached: {bug.reached}, "
+                    f"Triggered: {bug.triggered}, Detected: {bug.detected}"
+                )
+        return fit_terminal(lines)
+
+    # Earliest times over all runs, with the number of runs that triggered
+    def _bug_minima(self):
+        minima = {}
+        for run in list(self.campaign.runs.values()):
+            for bug in run.bugs:
+                entry = minima.setdefault(
+                    bug.bug_id,
+                    {"reached": None, "triggered": None, "detected": None, "runs": 0},
+                )
+                for key in ("reached", "triggered", "detected"):
+                    value = getattr(bug, key)
+                    if value is not None and (entry[key] is None or value < entry[key]):
+                        entry[key] = value
+                if bug.triggered is not None:
+                    entry["runs"] += 1
+        return minima
+
+    def _write_snapshot(self, done=False):
+        if not self.stream_path:
+            return
+        rate = self._rate()
+        remaining = self.total - self.completed
+        snapshot = {
+            "time": round(time.time(), 1),
+            "elapsed": round(time.monotonic() - self._start_time, 1),
+            "fuzzer": self.fuzzer,
+            "target": self.target,
+            "completed": self.completed,
+            "total": self.total,
+            "queue": [self.queue_completed, self.queue_total],
+            "crashes": [self.crash_completed, self.crash_total],
+            "runs": dict(self.runs),
+            "ungrouped_crashes": self.ungrouped_crashes,
+            "outcomes": dict(self.outcomes),
+            "seeds_per_s": round(rate, 2),
+            "eta": round(remaining / rate) if rate > 0 and not done else None,
+            "bugs": self._bug_minima(),
+            "done": done,
+        }
+        with open(self.stream_path, "a") as f:
+            f.write(json.dumps(snapshot) + "\n")
+
+
+# Last snapshot of a progress stream, reads only the tail of the file
+def read_last_progress(stream_path, tail_size=65536):
+    try:
+        with open(stream_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - tail_size))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
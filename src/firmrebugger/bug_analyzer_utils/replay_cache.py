@@ -0,0 +1,179 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+
+CACHE_FILE_NAME = "frb_replay_cache.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS replays (
+    seed_hash TEXT NOT NULL,
+    emulator TEXT NOT NULL,
+    descriptor_hash TEXT NOT NULL,
+    target TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    context TEXT NOT NULL,
+    bugs_reached TEXT NOT NULL,
+    bugs_triggered TEXT NOT NULL,
+    error INTEGER NOT NULL,
+    elapsed REAL NOT NULL,
+    outcome TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (seed_hash, emulator, descriptor_hash, target, kind, context)
+)
+"""
+
+
+# Hash the content of a file
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# The emulator a seed was replayed with. FRB_IMAGE_DIGEST is passed in by the
+# fuzz manager for the analyzer container, FRB_EMULATOR_ID can be set to make
+# images that ship the same replay engine share results. None when neither is
+# set, results of a rebuilt image could not be told apart from the old ones.
+def get_emulator_id():
+    return os.environ.get("FRB_EMULATOR_ID") or os.environ.get("FRB_IMAGE_DIGEST")
+
+
+# Default location is next to bug_descriptor.c so every fuzzer and trial of a
+# target shares one cache
+def get_cache_path(descriptor_path):
+    cache_path = os.environ.get("FRB_REPLAY_CACHE")
+    if cache_path:
+        return cache_path
+    return os.path.join(os.path.dirname(descriptor_path), CACHE_FILE_NAME)
+
+
+class ReplayCache:
+    def __init__(self, cache_path, bench_info, descriptor_path):
+        self.cache_path = cache_path
+        self.emulator = get_emulator_id()
+        self.target = str(bench_info["target"])
+        self.descriptor_hash = file_digest(descriptor_path)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._digests = {}
+        self._in_flight = {}
+        self._conn = sqlite3.connect(cache_path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(replays)")]
+        if "outcome" not in columns:
+            # Caches written before replay outcomes were recorded
+            self._conn.execute(
+                "ALTER TABLE replays ADD COLUMN outcome TEXT NOT NULL DEFAULT ''"
+            )
+        self._conn.commit()
+
+    # Memoized hash of a file shared by many seeds, e.g. a replay config
+    def context_digest(self, *paths):
+        digests = []
+        for path in paths:
+            path = os.path.abspath(path)
+            with self._lock:
+                digest = self._digests.get(path)
+            if digest is None:
+                digest = file_digest(path)
+                with self._lock:
+                    self._digests[path] = digest
+            digests.append(digest)
+        return ":".join(digests)
+
+    def _key(self, seed_hash, Crash, context):
+        kind = "crash" if Crash else "queue"
+        return (
+            seed_hash,
+            self.emulator,
+            self.descriptor_hash,
+            self.target,
+            kind,
+            context,
+        )
+
+    def _lookup(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT bugs_reached, bugs_triggered, error, elapsed, outcome "
+                "FROM replays "
+                "WHERE seed_hash=? AND emulator=? AND descriptor_hash=? "
+                "AND target=? AND kind=? AND context=?",
+                key,
+            ).fetchone()
+        if row is None:
+            return None
+        outcome = row[4] or ("emulator_error" if row[2] else "ok")
+        return json.loads(row[0]), json.loads(row[1]), bool(row[2]), row[3], outcome
+
+    def _store(self, key, bugs_reached, bugs_triggered, error, elapsed, outcome):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO replays VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                key
+                + (
+                    json.dumps(bugs_reached),
+                    json.dumps(bugs_triggered),
+                    int(error),
+                    elapsed,
+                    outcome,
+                ),
+            )
+            self._conn.commit()
+
+    # Return the cached result of a seed or replay it with replay_function.
+    # Identical seeds submitted concurrently are replayed only once.
+    def replay(self, replay_function, seed_path, time_val, Crash, context, hash_path):
+        key = self._key(file_digest(hash_path), Crash, context)
+
+        while True:
+            cached = self._lookup(key)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                bugs_reached, bugs_triggered, error, elapsed, outcome = cached
+                errors = [seed_path] if error else []
+                return (
+                    seed_path,
+                    bugs_triggered,
+                    bugs_reached,
+                    time_val,
+                    elapsed,
+                    errors,
+                    outcome,
+                    None,
+                )
+
+            with self._lock:
+                pending = self._in_flight.get(key)
+                if pending is None:
+                    self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait()
+
+        try:
+            result = replay_function()
+            _, bugs_triggered, bugs_reached, _, elapsed, errors, outcome, _ = result
+            # A timeout depends on the limit and the load, so it is not kept
+            if outcome != "timeout":
+                self._store(
+                    key, bugs_reached, bugs_triggered, bool(errors), elapsed, outcome
+                )
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        print(
+            f"Replay cache: {self.hits} cached, {self.misses} replayed ({self.cache_path})"
+        )
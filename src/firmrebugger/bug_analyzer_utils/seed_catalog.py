@@ -0,0 +1,115 @@
+import os
+import re
+
+AFL_FIELD = re.compile(r"([a-z]+)[:_](.*)")
+
+
+# A seed of an AFL-style queue or crashes dir with the metadata of its file
+# name. time_ms is the time: field, mtime is only set when it was asked for.
+class SeedRecord:
+    __slots__ = ("path", "name", "Crash", "id", "time_ms", "orig", "sig", "mtime")
+
+    def __init__(self, path, name, Crash, fields, mtime=None):
+        self.path = path
+        self.name = name
+        self.Crash = Crash
+        self.id = _int_field(fields, "id")
+        self.time_ms = _int_field(fields, "time")
+        self.orig = fields.get("orig")
+        self.sig = _int_field(fields, "sig")
+        self.mtime = mtime
+
+    # Seconds since the start of the trial from the time: field
+    def name_time(self):
+        if self.time_ms is None:
+            return None
+        return round(self.time_ms / 1000)
+
+
+def _int_field(fields, key):
+    value = fields.get(key)
+    if value is None:
+        return None
+    match = re.match(r"\d+", value)
+    return int(match.group()) if match else None
+
+
+# Fields of an AFL seed name like id:000012,sig:11,src:000003,time:4711,
+# also with _ instead of : as written by some AFL forks
+def parse_afl_name(name):
+    fields = {}
+    offset = 0
+    for part in name.split(","):
+        match = AFL_FIELD.fullmatch(part)
+        if match is not None:
+            key, value = match.groups()
+            if key == "orig":
+                # The rest of the name, original file names may contain commas
+                fields[key] = name[offset + len(key) + 1 :]
+                break
+            fields[key] = value
+        offset += len(part) + 1
+    return fields
+
+
+# Seconds of a seed from its time: field, seeds without one are printed
+def get_name_time(seed):
+    time_value = seed.name_time()
+    if time_value is None:
+        print(seed.path)
+    return time_value
+
+
+# Parse an AFL fuzzer_stats file into a dict of its fields
+def read_fuzzer_stats(stats_path):
+    stats = {}
+    with open(stats_path, "r") as f:
+        for line in f:
+            key, sep, value = line.partition(":")
+            if sep:
+                stats[key.strip()] = value.strip()
+    return stats
+
+
+def get_start_time(stats_path):
+    try:
+        start_time = read_fuzzer_stats(stats_path).get("start_time")
+    except Exception as e:
+        raise RuntimeError(f"Could not read {stats_path}: {e}")
+    if start_time is None or not start_time.isdigit():
+        raise RuntimeError(f"start_time not found in {stats_path}")
+    return int(start_time)
+
+
+# Seeds of one dir with a single scandir pass, sorted by name. README files
+# are skipped, with require_id only names starting with id are seeds.
+def scan_seed_dir(seed_dir, Crash, require_id=True, with_mtime=False):
+    seeds = []
+    with os.scandir(seed_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if "README" in name or (require_id and not name.startswith("id")):
+                continue
+            mtime = entry.stat().st_mtime if with_mtime else None
+            fields = parse_afl_name(name)
+            seeds.append(SeedRecord(entry.path, name, Crash, fields, mtime))
+    seeds.sort(key=lambda seed: seed.name)
+    return seeds
+
+
+# Queue seeds followed by the crash seeds of an AFL output dir like
+# output-XX/default. Both dirs have to exist.
+def catalog_seeds(seed_root, require_id=True, with_mtime=False):
+    seeds = []
+    for folder_name, Crash in (("queue", False), ("crashes", True)):
+        working_folder = os.path.join(seed_root, folder_name)
+        if not os.path.isdir(working_folder):
+            raise FileNotFoundError(
+                f"The '{folder_name.capitalize()}' folder does not exist at: {working_folder}"
+            )
+        seeds.extend(
+            scan_seed_dir(
+                working_folder, Crash, require_id=require_id, with_mtime=with_mtime
+            )
+        )
+    return seeds
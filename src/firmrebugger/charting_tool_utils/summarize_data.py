@@ -2,6 +2,7 @@ import json
 import pandas as pd
 import numpy as np
 import argparse
+from firmrebugger.bug_analyzer_utils.campaign_model import CampaignModel
 
 
 def compute_median_survival(group, duration_col, event_col):
@@ -32,23 +33,17 @@ def summarize_data(json_file):
     if "Campaign" not in json_data:
         raise KeyError("'Campaign' key not found in the JSON data.")
 
-    for run, trials in json_data["Campaign"].items():
-        for trial in trials:
-            if "ungrouped_crashes" in trial or "multi_bugs_triggered" in trial:
-                ungrouped_get = trial.get("ungrouped_crashes")
-                if ungrouped_get is not None:
-                    for crash in ungrouped_get:
-                        total_ungrouped_crashes.append(crash)
-                continue
+    campaign = CampaignModel.from_report(json_data["Campaign"])
+    for run in campaign.runs.values():
+        total_ungrouped_crashes.extend(run.ungrouped_crashes)
 
-            bug_id = trial.get("bug_id")
-            if bug_id is None:
-                continue  # Skip if bug_id is missing
+        for bug in run.bugs:
+            bug_id = bug.bug_id
 
             # For triggered events
-            if trial.get("triggered") is not None:
+            if bug.triggered is not None:
                 triggered_event_observed = 1  # Event occurred
-                triggered_duration = trial["triggered"]
+                triggered_duration = bug.triggered
                 trigger_count[bug_id] = (
                     trigger_count.get(bug_id, 0) + 1
                 )  # Increment trigger count
@@ -57,8 +52,8 @@ def summarize_data(json_file):
                 triggered_duration = MAX_TRIAL_TIME  # Censoring at max trial time
 
             # For reached events
-            if trial.get("reached") is not None:
-                reached_duration = trial["reached"]
+            if bug.reached is not None:
+                reached_duration = bug.reached
                 reached_event_observed = 1  # Event occurred
             else:
                 reached_duration = MAX_TRIAL_TIME  # Censoring at max trial time
@@ -4,8 +4,9 @@ import sys
 from firmrebugger.commands.charting_tool import run_charting_tool
 from firmrebugger.commands.build import build_fuzzers
 from firmrebugger.common import parse_fuzzing_time
-from firmrebugger.commands.fuzz import fuzz
-from firmrebugger.commands.bug_analyzer import run_bug_analyzer
+from firmrebugger.commands.fuzz import fuzz, resume_fuzz
+from firmrebugger.commands.bug_analyzer import run_bug_analyzer, fuzzer_function_mapping
+from firmrebugger.commands.analysis_bench import run_analysis_bench
 
 def check_docker_nosudo():
     """Check if Docker can be run without sudo."""
@@ -27,6 +28,15 @@ def check_docker_nosudo():
         click.echo("[!] Docker is not installed or not accessible.", err=True)
         return False
 
+# Parse a duration option given as e.g. 24h, 90m or 3600s into seconds
+def duration_option(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return parse_fuzzing_time(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
 HELP_TEXT = """
 FirmReBugger Benchmark Tool
 
@@ -36,6 +46,7 @@ Commands:
   build           Build fuzzers with Docker. 
   bug-analyzer    Generate FirmReBugger bug reports. 
   charting-tool   Visualizes data from FirmReBugger reports. 
+  analysis-bench  Benchmark the bug analyzers on synthetic campaigns.
 
 Note:
   It is recommended to build the FirmReBugger versions locally. 
@@ -51,11 +62,13 @@ def main():
     pass
 
 @main.command()
-@click.option('--time', '-t', default='24h', help='Duration (s,m,h) to run fuzzing')
+@click.option('--time', '-t', default='24h', callback=duration_option, help='Duration (s,m,h) to run fuzzing')
 @click.option('--num-trials', '-n', type=int, default=10, help='Number of trials to run')
 @click.option('--output-name', '-o', default='fuzzing_results', help='Name for output directory')
 @click.option('--full', is_flag=True, help='Run bug analyzer after fuzzing completes')
-def fuzz_cmd(time, num_trials, output_name, full):
+@click.option('--reserve-siblings', is_flag=True, help='Leave the SMT siblings of pinned trials idle')
+@click.option('--resume', metavar='CAMPAIGN', default=None, help='Resume an interrupted campaign by its output name')
+def fuzz_cmd(time, num_trials, output_name, full, reserve_siblings, resume):
     """
     Fuzz using FirmReBugger Benchmarks. 
     
@@ -65,9 +78,16 @@ def fuzz_cmd(time, num_trials, output_name, full):
       --num-trials, -n   Number of trials to run [default: 10]
       --output-name, -o  Name for output directory [default: fuzzing_results]
       --full             Run bug analyzer after fuzzing completes
+      --reserve-siblings Pin every trial to a physical core of its own and
+                         leave its SMT siblings idle
+      --resume CAMPAIGN  Resume an interrupted campaign by its output name,
+                         running containers are adopted and only missing
+                         trials are run again
     """
-    fuzzing_time_seconds = parse_fuzzing_time(time)
-    fuzz(fuzzing_time_seconds, num_trials, output_name, full)
+    if resume:
+        resume_fuzz(resume)
+        return
+    fuzz(time, num_trials, output_name, full, reserve_siblings)
 
 @main.command()
 @click.option('--frb', is_flag=True, help='Build FirmReBugger version')
@@ -83,17 +103,101 @@ def build(frb):
 
 @main.command("bug-analyzer")
 @click.argument('fuzzing_results_dir', default='./')
-def bug_analyzer(fuzzing_results_dir):
+@click.option('--no-cache', is_flag=True, help='Replay every seed, ignoring the replay cache')
+@click.option('--anytime', is_flag=True, help='Replay seeds in discovery order and write partial reports')
+@click.option('--deadline', default=None, callback=duration_option, help='Duration (s,m,h) after which no more seeds are replayed, implies --anytime')
+@click.option('--replay-timeout', type=int, default=None, help='Seconds before a hung seed replay is killed [default: per fuzzer]')
+@click.option('--witness-logs', is_flag=True, help='Keep the full replay output of crash seeds in frb_witness_logs')
+@click.option('--multi-trigger', is_flag=True, help='Replay crash seeds past their first triggered bug')
+def bug_analyzer(fuzzing_results_dir, no_cache, anytime, deadline, replay_timeout, witness_logs, multi_trigger):
     """
     Generate FirmReBugger bug reports. 
     
     \b
     Arguments:
       FUZZING_RESULTS_DIR  Directory with fuzzing results [default: ./]
+
+    \b
+    Options:
+      --no-cache         Replay every seed, ignoring the replay cache
+      --anytime          Replay seeds in discovery order and write partial reports,
+                         seeds that cannot lower a time are skipped once every
+                         bug of their run has been reached and triggered
+      --deadline         Duration (s,m,h) after which no more seeds are replayed,
+                         implies --anytime
+      --replay-timeout   Seconds before a hung seed replay is killed
+                         [default: per fuzzer]
+      --witness-logs     Keep the full replay output of crash seeds in
+                         frb_witness_logs
+      --multi-trigger    Replay crash seeds past their first triggered bug to
+                         detect seeds that trigger several bugs
     """
-    run_bug_analyzer(fuzzing_results_dir)
+    if deadline is not None:
+        deadline = int(deadline)
+    run_bug_analyzer(
+        fuzzing_results_dir,
+        use_cache=not no_cache,
+        anytime=anytime,
+        deadline=deadline,
+        replay_timeout=replay_timeout,
+        witness_logs=witness_logs,
+        multi_trigger=multi_trigger,
+    )
 
 @main.command("charting-tool")
 def charting_tool():
     """Visualizes data from FirmReBugger reports."""
-    run_charting_tool()
\ No newline at end of file
+    run_charting_tool()
+
+@main.command("analysis-bench")
+@click.option('--fuzzer', '-f', 'fuzzers', multiple=True, type=click.Choice(sorted(fuzzer_function_mapping)), help='Analyzer to benchmark, repeatable [default: all]')
+@click.option('--runs', type=int, default=2, help='Trials per synthetic campaign')
+@click.option('--queue-seeds', type=int, default=200, help='Queue seeds per trial')
+@click.option('--crash-seeds', type=int, default=20, help='Crash seeds per trial')
+@click.option('--bugs', type=int, default=8, help='Bugs in the synthetic descriptor')
+@click.option('--latency-scale', type=float, default=0.1, help='Factor applied to the replay latency of each backend')
+@click.option('--no-events', is_flag=True, help='Let the stub replayer report on stdout only')
+@click.option('--noise-lines', type=int, default=0, help='Lines of emulator output the stub prints per seed')
+@click.option('--use-cache', is_flag=True, help='Analyze with the replay cache enabled')
+@click.option('--seed', type=int, default=0, help='Seed of the campaign generator')
+@click.option('--output', '-o', 'output_path', default=None, help='Write the JSON results to this file instead of stdout')
+@click.option('--keep', is_flag=True, help='Keep the generated campaigns')
+def analysis_bench(fuzzers, runs, queue_seeds, crash_seeds, bugs, latency_scale, no_events, noise_lines, use_cache, seed, output_path, keep):
+    """
+    Benchmark the bug analyzers on synthetic campaigns.
+
+    Generates a campaign in the layout of each fuzzer, replays it with a stub
+    replayer and reports seeds/s, peak RSS and the time spent in each phase
+    of the report generation as JSON.
+
+    \b
+    Options:
+      --fuzzer, -f       Analyzer to benchmark, repeatable [default: all]
+      --runs             Trials per synthetic campaign [default: 2]
+      --queue-seeds      Queue seeds per trial [default: 200]
+      --crash-seeds      Crash seeds per trial [default: 20]
+      --bugs             Bugs in the synthetic descriptor [default: 8]
+      --latency-scale    Factor applied to the replay latency of each backend
+                         [default: 0.1]
+      --no-events        Let the stub replayer report on stdout only
+      --noise-lines      Lines of emulator output the stub prints per seed
+                         [default: 0]
+      --use-cache        Analyze with the replay cache enabled
+      --seed             Seed of the campaign generator [default: 0]
+      --output, -o       Write the JSON results to this file instead of stdout
+      --keep             Keep the generated campaigns
+    """
+    run_analysis_bench(
+        fuzzers,
+        runs=runs,
+        queue_seeds=queue_seeds,
+        crash_seeds=crash_seeds,
+        num_bugs=bugs,
+        latency_scale=latency_scale,
+        events=not no_events,
+        noise_lines=noise_lines,
+        use_cache=use_cache,
+        seed=seed,
+        output_path=output_path,
+        keep=keep,
+    )
@@ -0,0 +1,230 @@
+from firmrebugger.analysis_bench.campaigns import generate_campaign
+from firmrebugger.bug_analyzer_utils.campaign_model import CampaignModel
+from firmrebugger.commands.bug_analyzer import (
+    fuzzer_function_mapping,
+    generate_frb_report,
+)
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import resource
+import tempfile
+import traceback
+import multiprocessing
+from importlib import metadata
+
+# Bumped whenever a field of the benchmark output changes its meaning
+SCHEMA_VERSION = 5
+
+
+def get_frb_version():
+    try:
+        return metadata.version("firmrebugger")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+# Differences between the report and the bug times of the generated seeds
+def check_report(report, expected):
+    campaign = CampaignModel.from_report(report["Campaign"])
+    mismatches = []
+    for run_name, run_expected in expected.items():
+        run = campaign.runs.get(run_name)
+        if run is None:
+            mismatches.append(f"{run_name}: missing")
+            continue
+        for bug_id, times in run_expected["bugs"].items():
+            bug = campaign.get_bug(run_name, bug_id)
+            found = [bug.reached, bug.triggered, bug.detected] if bug else None
+            if found != times:
+                mismatches.append(f"{run_name} {bug_id}: {found} != {times}")
+        ungrouped = len(run.ungrouped_crashes)
+        if ungrouped != run_expected["ungrouped_crashes"]:
+            mismatches.append(
+                f"{run_name} ungrouped crashes: {ungrouped} != "
+                f"{run_expected['ungrouped_crashes']}"
+            )
+    return mismatches
+
+
+# Runs in a forked child, the analyzers change the environment and working
+# directory of the process and peak RSS is only meaningful per analysis
+def analyze_campaign(campaign, use_cache, log_path, conn):
+    try:
+        log_fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(log_fd, 1)
+        os.dup2(log_fd, 2)
+        os.close(log_fd)
+        os.environ.update(campaign["env"])
+        os.chdir(campaign["results_dir"])
+
+        cpu_start = os.times()
+        start = time.perf_counter()
+        generate_frb_report(
+            campaign["results_dir"], campaign["descriptor_path"], use_cache=use_cache
+        )
+        wall = time.perf_counter() - start
+        cpu_end = os.times()
+
+        report_path = os.path.join(campaign["results_dir"], "frb_report.json")
+        with open(report_path, "r") as f:
+            report = json.load(f)
+        instrumentation = report["instrumentation"]
+        latency = instrumentation["latency"]["all"]
+        seeds = sum(summary["count"] for summary in latency.values())
+        for run_cached in instrumentation["cached_seeds"].values():
+            seeds += sum(run_cached.values())
+        replay_time = instrumentation["phases"]["replay"]["wall_s"]
+        self_usage = resource.getrusage(resource.RUSAGE_SELF)
+        result = {
+            "wall_s": round(wall, 3),
+            "cpu_user_s": round(cpu_end.user - cpu_start.user, 3),
+            "cpu_system_s": round(cpu_end.system - cpu_start.system, 3),
+            "replayer_cpu_s": round(
+                cpu_end.children_user
+                + cpu_end.children_system
+                - cpu_start.children_user
+                - cpu_start.children_system,
+                3,
+            ),
+            "phases": instrumentation["phases"],
+            "latency": {
+                kind: {key: summary[key] for key in ("p50", "p95", "p99", "max")}
+                for kind, summary in latency.items()
+            },
+            "replay_resources": instrumentation["resources"]["all"],
+            "seeds": seeds,
+            "seeds_per_s": round(seeds / replay_time, 2) if replay_time > 0 else None,
+            # ru_maxrss is in KiB on Linux. It is not reported for the
+            # replayers, their peak includes the image they were forked from.
+            "peak_rss_kib": self_usage.ru_maxrss,
+        }
+        mismatches = check_report(report, campaign["expected"])
+        result["correct"] = not mismatches
+        result["mismatches"] = mismatches[:20]
+        conn.send(result)
+    except BaseException:
+        conn.send({"error": traceback.format_exc()})
+    finally:
+        conn.close()
+
+
+def bench_fuzzer(fuzzer, work_dir, config):
+    root = os.path.join(work_dir, fuzzer)
+    os.makedirs(root)
+    stub_options = {
+        "events": config["events"],
+        "noise_lines": config["noise_lines"],
+    }
+    start = time.perf_counter()
+    campaign = generate_campaign(
+        root,
+        fuzzer,
+        runs=config["runs"],
+        queue_seeds=config["queue_seeds"],
+        crash_seeds=config["crash_seeds"],
+        num_bugs=config["num_bugs"],
+        latency_scale=config["latency_scale"],
+        seed=config["seed"],
+        stub_options=stub_options,
+    )
+    generate_time = time.perf_counter() - start
+
+    log_path = os.path.join(root, "analysis.log")
+    ctx = multiprocessing.get_context("fork")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(
+        target=analyze_campaign,
+        args=(campaign, config["use_cache"], log_path, child_conn),
+    )
+    proc.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {"error": f"analysis exited with code {proc.exitcode}"}
+    proc.join()
+    if proc.exitcode and "error" not in result:
+        result["error"] = f"analysis exited with code {proc.exitcode}"
+    if "error" in result:
+        result["log"] = log_path
+    result["generate_s"] = round(generate_time, 3)
+    result["seeds_generated"] = campaign["seeds"]
+    return result
+
+
+# Generate a synthetic campaign for every fuzzer, analyze it against the stub
+# replayer and collect the timings as JSON. The output only depends on the
+# configuration and the measured numbers, keys are sorted so reports of
+# different versions can be diffed.
+def run_analysis_bench(
+    fuzzers,
+    runs=2,
+    queue_seeds=200,
+    crash_seeds=20,
+    num_bugs=8,
+    latency_scale=0.1,
+    events=True,
+    noise_lines=0,
+    use_cache=False,
+    seed=0,
+    output_path=None,
+    keep=False,
+):
+    fuzzers = list(fuzzers) or list(fuzzer_function_mapping)
+    config = {
+        "runs": runs,
+        "queue_seeds": queue_seeds,
+        "crash_seeds": crash_seeds,
+        "num_bugs": num_bugs,
+        "latency_scale": latency_scale,
+        "events": events,
+        "noise_lines": noise_lines,
+        "use_cache": use_cache,
+        "seed": seed,
+    }
+    work_dir = tempfile.mkdtemp(prefix="frb_analysis_bench_")
+    results = {}
+    try:
+        for fuzzer in fuzzers:
+            print(f"Benchmarking the {fuzzer} analyzer...", file=sys.stderr)
+            results[fuzzer] = bench_fuzzer(fuzzer, work_dir, config)
+            result = results[fuzzer]
+            if "error" in result:
+                print(f"  failed, see {result['log']}", file=sys.stderr)
+            else:
+                print(
+                    f"  {result['wall_s']}s, {result['seeds_per_s']} seeds/s, "
+                    f"peak RSS {result['peak_rss_kib']} KiB, "
+                    f"{'correct' if result['correct'] else 'WRONG RESULTS'}",
+                    file=sys.stderr,
+                )
+    finally:
+        if keep:
+            print(f"Campaigns kept in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    data = {
+        "schema_version": SCHEMA_VERSION,
+        "frb_version": get_frb_version(),
+        "config": config,
+        "host": {
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    text = json.dumps(data, indent=4, sort_keys=True)
+    if output_path:
+        with open(output_path, "w") as f:
+            f.write(text + "\n")
+        print(f"Benchmark results written to {output_path}", file=sys.stderr)
+    else:
+        print(text)
+    return data
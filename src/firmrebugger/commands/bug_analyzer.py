@@ -1,10 +1,10 @@
 from firmrebugger.bug_analyzer_utils.common import (
-    init_run,
     add_execution_time,
-    init_bug_info,
     get_bench_info,
     print_bug_info,
     extract_bug_ids,
+    remove_scratch_dir,
+    replay_seeds,
 )
 from firmrebugger.common import get_working_dirs
 from firmrebugger.bug_analyzer_utils.ember_analyzer import ember_analyzer
@@ -14,11 +14,26 @@ from firmrebugger.bug_analyzer_utils.multifuzz_analyzer import multifuzzer_analy
 from firmrebugger.charting_tool_utils.summarize_data import summarize_data
 from firmrebugger.bug_analyzer_utils.semu_analyzer import semu_analyzer
 from firmrebugger.bug_analyzer_utils.dice_analyzer import dice_analyzer
+from firmrebugger.bug_analyzer_utils.replay_cache import (
+    ReplayCache,
+    get_cache_path,
+    get_emulator_id,
+)
+from firmrebugger.bug_analyzer_utils.campaign_model import CampaignModel
+from firmrebugger.bug_analyzer_utils.progress import (
+    AnalysisProgress,
+    PROGRESS_FILE_NAME,
+)
+from firmrebugger.bug_analyzer_utils.instrumentation import (
+    AnalysisInstrumentation,
+    USAGE_FILE_NAME,
+)
 
 import os
 import sys
 import re
 import json
+import time
 import shutil
 import tarfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -35,6 +50,24 @@ fuzzer_function_mapping = {
     "DICE": dice_analyzer,
 }
 
+# Seconds a single replay may take before it is killed as hung. The Python
+# based replayers pay a few seconds of start-up per seed.
+DEFAULT_REPLAY_TIMEOUT = 120
+replay_timeouts = {
+    "Ember-IO-Fuzzing": 60,
+    "Fuzzware": 300,
+    "Fuzzware-Icicle": 300,
+    "SplITS": 300,
+    "GDMA": 300,
+    "Hoedur": 60,
+    "MultiFuzz": 60,
+    "SEmu-Fuzz": 120,
+    "DICE": 120,
+}
+
+# Full replay output of crash seeds, written with --witness-logs
+WITNESS_LOG_DIR_NAME = "frb_witness_logs"
+
 
 def tar_folder(folder_paths):
     print("Archiving folders to tar.gz files...")
@@ -44,7 +77,8 @@ def tar_folder(folder_paths):
             print(f"Error: {path} is not a valid directory.")
             return None
 
-        archive_name = path.rstrip(os.sep).split(os.sep)[-1] + ".tar.gz"
+        # Next to the folder, independent of the working directory
+        archive_name = path.rstrip(os.sep) + ".tar.gz"
         try:
             # print(f"Creating archive for {path}: {archive_name}")
             with tarfile.open(archive_name, "w:gz") as tar:
@@ -97,7 +131,58 @@ def get_fuzzer_function(fuzzer):
         sys.exit(1)
 
 
-def generate_frb_report(fuzzing_results_dir, descriptor_path):
+# Collect the seed jobs of every run up front, each tagged with its run. Runs
+# whose analyzer streams its seeds are chained so they are pulled lazily.
+def discover_jobs(
+    analyzer_function, bench_info, output_dirs, descriptor_path, replay_cache
+):
+    run_jobs = []
+    for output in output_dirs:
+        run_name = f"run-{get_run_number(output)}"
+        jobs = analyzer_function(
+            bench_info,
+            output,
+            descriptor_path=descriptor_path,
+            replay_cache=replay_cache,
+        )
+        run_jobs.append((run_name, jobs))
+
+    if all(isinstance(jobs, list) for _, jobs in run_jobs):
+        return [dict(job, run=run_name) for run_name, jobs in run_jobs for job in jobs]
+    return (dict(job, run=run_name) for run_name, jobs in run_jobs for job in jobs)
+
+
+# Written through a temporary file so an interrupted analysis never leaves a
+# truncated report behind
+def write_frb_report(data, campaign, report_path, instrumentation=None):
+    data["Campaign"] = campaign.to_report()
+    if instrumentation is not None:
+        data["instrumentation"] = instrumentation.to_report()
+    tmp_path = f"{report_path}.tmp"
+    with open(tmp_path, "w") as json_file:
+        json.dump(data, json_file, indent=4)  # Save the JSON data to the file
+    os.replace(tmp_path, report_path)
+
+
+def generate_frb_report(
+    fuzzing_results_dir,
+    descriptor_path,
+    use_cache=True,
+    anytime=False,
+    deadline=None,
+    replay_timeout=None,
+    witness_logs=False,
+    multi_trigger=False,
+):
+    instrumentation = AnalysisInstrumentation(
+        usage_path=os.path.abspath(f"{fuzzing_results_dir}/{USAGE_FILE_NAME}")
+    )
+    instrumentation.start("discovery")
+    report_path = os.path.abspath(f"{fuzzing_results_dir}/frb_report.json")
+    progress_path = os.path.abspath(f"{fuzzing_results_dir}/{PROGRESS_FILE_NAME}")
+    witness_dir = None
+    if witness_logs:
+        witness_dir = os.path.abspath(f"{fuzzing_results_dir}/{WITNESS_LOG_DIR_NAME}")
     output_dirs = get_working_dirs(fuzzing_results_dir)
     bug_list = extract_bug_ids(descriptor_path)
     bench_info = get_bench_info(fuzzing_results_dir)
@@ -113,62 +198,126 @@ def generate_frb_report(fuzzing_results_dir, descriptor_path):
 
     data_to_print = {k: v for k, v in data.items() if k != "Campaign"}
     print(json.dumps(data_to_print, indent=4))
-    all_times = []
 
-    for output in output_dirs:
-        run_count = get_run_number(output)
-        print(f"---- run{run_count} ----")
-        data["Campaign"] = init_run(data["Campaign"], f"run-{run_count}")
-        for bug_id in bug_list:
-            data["Campaign"][f"run-{run_count}"] = init_bug_info(
-                data["Campaign"][f"run-{run_count}"], bug_id
-            )
-
-        analyzer_function = get_fuzzer_function(fuzzer)
-        run_data, time_inputs = analyzer_function(
-            bench_info,
-            output,
-            run_data=data["Campaign"][f"run-{run_count}"],
-            Crash=False,
-            run_name=f"run-{run_count}",
-            descriptor_path=descriptor_path,
+    # Partial reports only hold times of replayed seeds, each one is an upper
+    # bound of the time the full analysis would report. Skipped seeds cannot
+    # change a time, but the crash lists of a pruned report miss their seeds.
+    anytime_info = None
+    checkpoint = None
+    if anytime or deadline is not None:
+        anytime_info = {
+            "complete": False,
+            "pruned": False,
+            "seeds_replayed": 0,
+            "seeds_skipped": 0,
+            "seeds_remaining": 0,
+        }
+        data["Anytime"] = anytime_info
+        if deadline is not None:
+            deadline = time.time() + deadline
+
+        def checkpoint():
+            write_frb_report(data, campaign, report_path, instrumentation)
+
+    replay_cache = None
+    if use_cache and get_emulator_id() is None:
+        print(
+            "Replay cache disabled: the image of the replayer is unknown, set "
+            "FRB_EMULATOR_ID or FRB_IMAGE_DIGEST to enable it."
         )
-        run_data, time_crashes = analyzer_function(
-            bench_info,
-            output,
-            run_data=data["Campaign"][f"run-{run_count}"],
-            Crash=True,
-            run_name=f"run-{run_count}",
-            descriptor_path=descriptor_path,
+    elif use_cache:
+        replay_cache = ReplayCache(
+            get_cache_path(descriptor_path), bench_info, descriptor_path
         )
 
-        all_times.extend(time_inputs)
-        all_times.extend(time_crashes)
-        print_bug_info(run_data)
+    campaign = CampaignModel(bug_list)
+    for output in output_dirs:
+        campaign.add_run(f"run-{get_run_number(output)}")
+
+    analyzer_function = get_fuzzer_function(fuzzer)
+    if replay_timeout is None:
+        replay_timeout = replay_timeouts.get(fuzzer, DEFAULT_REPLAY_TIMEOUT)
+    progress = AnalysisProgress(campaign, bench_info, stream_path=progress_path)
+    progress.start()
+    # Seeds of all runs share one pool so the tails of the runs overlap
+    jobs = discover_jobs(
+        analyzer_function, bench_info, output_dirs, descriptor_path, replay_cache
+    )
+    instrumentation.switch("replay")
+    all_times = replay_seeds(
+        jobs,
+        campaign,
+        progress,
+        replay_cache,
+        replay_timeout=replay_timeout,
+        anytime=anytime_info,
+        deadline=deadline,
+        checkpoint=checkpoint,
+        witness_dir=witness_dir,
+        exit_on_trigger=not multi_trigger,
+        instrumentation=instrumentation,
+    )
+
+    progress.stop()
+    instrumentation.switch("aggregation")
+
+    for output in output_dirs:
+        remove_scratch_dir(output)
+        run_name = f"run-{get_run_number(output)}"
+        print(f"---- {run_name} ----")
+        print_bug_info(campaign.runs[run_name])
+
+    if replay_cache is not None:
+        replay_cache.close()
 
     add_execution_time(all_times, data)
 
+    if anytime_info is not None:
+        anytime_info["pruned"] = anytime_info["seeds_skipped"] > 0
+        anytime_info["complete"] = (
+            anytime_info["seeds_remaining"] == 0 and not anytime_info["pruned"]
+        )
+        print(
+            f"Anytime analysis: {anytime_info['seeds_replayed']} replayed, "
+            f"{anytime_info['seeds_skipped']} skipped, "
+            f"{anytime_info['seeds_remaining']} left after the deadline"
+        )
+
     # print(data)
 
-    with open(f"{fuzzing_results_dir}/frb_report.json", "w") as json_file:
-        json.dump(data, json_file, indent=4)  # Save the JSON data to the file
+    write_frb_report(data, campaign, report_path, instrumentation)
 
     print("Summary of the analysis:")
-    print(summarize_data(f"{fuzzing_results_dir}/frb_report.json"))
+    print(summarize_data(report_path))
     print("\n")
 
-    # Tar the output directories for fuzzers that use alot of space
-    if (
+    # Keep the seeds around to finish an analysis cut short by the deadline or
+    # pruned by the anytime rules, otherwise tar the output directories for fuzzers that use alot of space
+    if (anytime_info is None or anytime_info["complete"]) and (
         "Fuzzware-Icicle" in fuzzer
         or "SplITS" in fuzzer
         or "Fuzzware" in fuzzer
         or "GDMA" in fuzzer
         or "DICE" in fuzzer
     ):
+        instrumentation.switch("archiving")
         tar_folder(output_dirs)
 
+    # Written again so the report also holds the time of its own aggregation
+    # and of the archiving
+    instrumentation.stop()
+    write_frb_report(data, campaign, report_path, instrumentation)
+
 
-def run_bug_analyzer(fuzzing_results_dir):
+def run_bug_analyzer(
+    fuzzing_results_dir,
+    use_cache=True,
+    anytime=False,
+    deadline=None,
+    replay_timeout=None,
+    witness_logs=False,
+    multi_trigger=False,
+):
     print("Starting Bug Analyzer...")
     descriptor_path = f"{fuzzing_results_dir}/../../../../bug_descriptor.c"
     descriptor_path = os.path.abspath(descriptor_path)
@@ -176,4 +325,13 @@ def run_bug_analyzer(fuzzing_results_dir):
     if not os.path.isfile(descriptor_path):
         print(f"Descriptor file not found: {descriptor_path}")
         sys.exit(1)
-    generate_frb_report(fuzzing_results_dir, descriptor_path)
+    generate_frb_report(
+        fuzzing_results_dir,
+        descriptor_path,
+        use_cache=use_cache,
+        anytime=anytime,
+        deadline=deadline,
+        replay_timeout=replay_timeout,
+        witness_logs=witness_logs,
+        multi_trigger=multi_trigger,
+    )
@@ -1,6 +1,30 @@
 from firmrebugger.common import get_frb_base_dir, menu
 from firmrebugger.commands.build import check_docker_builds
 from firmrebugger.common import parse_fuzzing_time
+from firmrebugger.fuzz_utils.campaign_journal import (
+    JOB_LABEL,
+    CampaignJournal,
+    get_journal_path,
+    job_key,
+    persistent_job,
+    read_journal,
+    replay_journal,
+)
+from firmrebugger.fuzz_utils.cpu_topology import CoreAllocator, read_cpu_topology
+from firmrebugger.fuzz_utils.containers import (
+    ContainerEvents,
+    ContainerProcess,
+    get_docker_client,
+    placement_kwargs,
+    remove_exited_container,
+    stream_logs,
+)
+from firmrebugger.bug_analyzer_utils.progress import (
+    PROGRESS_FILE_NAME,
+    LiveLines,
+    fit_terminal,
+    read_last_progress,
+)
 import os
 import sys
 import shutil
@@ -8,7 +32,8 @@ import subprocess
 import time
 import yaml
 import glob
-import select
+import selectors
+import docker
 
 FIRMREBUGGER_BASE_DIR = None
 FUZZING_TIME = "24h"
@@ -16,13 +41,48 @@ FUZZING_OUTPUT_NAME = "fuzzing_results"
 FUZZING_NUM_TRIALS = 10
 SELECTED_BENCH = None
 RUN_ANALYZER = False  # Only run analyzer if --full flag is set
+RESERVE_SIBLINGS = False  # Keep the SMT siblings of pinned trials idle
 # Check if fuzzing is active to not kill any active jobs
 FUZZER_ACTIVE = False
+# The job status is redrawn at most this often on a terminal, otherwise it is
+# printed every STATUS_LOG_INTERVAL seconds and when jobs change
+REDRAW_INTERVAL = 1
+STATUS_LOG_INTERVAL = 60
+# Jobs are polled this often while the docker event stream is down
+POLL_INTERVAL = 1
 
 jobs = []  # running jobs
 job_queue = []  # queued jobs
 completed_trials = {}  # Track completed trials per fuzzing group
 analyzer_queued = set()  # Track which analyzer jobs have been queued
+journal = None  # CampaignJournal of the running campaign
+allocator = None  # CoreAllocator pinning the fuzzing containers
+container_events = None  # ContainerEvents reporting the exits of the jobs
+
+
+# Append a record to the campaign journal, if there is one
+def record(event, **fields):
+    if journal is not None:
+        try:
+            journal.write(event, **fields)
+        except Exception as e:
+            print(f"Error writing campaign journal: {e}")
+
+
+# Queue a job and journal it
+def queue_job(job_info):
+    job_queue.append(job_info)
+    record("enqueue", key=job_key(job_info), job=job_info)
+
+
+def journal_settings():
+    return {
+        "bench": SELECTED_BENCH,
+        "fuzzing_time": FUZZING_TIME,
+        "num_trials": FUZZING_NUM_TRIALS,
+        "run_analyzer": RUN_ANALYZER,
+        "reserve_siblings": RESERVE_SIBLINGS,
+    }
 
 
 # Initialize the bench info file
@@ -66,6 +126,18 @@ def end_write_bench_info(bench_info_path, ending_time, elapsed_time):
         print(f"Error updating bench info: {e}")
 
 
+# Record the CPU placement of a trial in the bench info
+def write_bench_placement(bench_info_path, trial_name, placement):
+    try:
+        with open(f"{os.path.dirname(bench_info_path)}/frb_bench_info.yml", "r") as f:
+            data = yaml.safe_load(f)
+        data.setdefault("Placement", {})[trial_name] = placement
+        with open(f"{os.path.dirname(bench_info_path)}/frb_bench_info.yml", "w") as f:
+            yaml.dump(data, f, sort_keys=False)
+    except Exception as e:
+        print(f"Error writing placement to bench info: {e}")
+
+
 # Create a .bin file from an .elf file using arm-none-eabi-objcopy
 def create_bin_from_elf(elf_path, result_dir):
     global FUZZER_ACTIVE
@@ -91,23 +163,18 @@ def create_bin_from_elf(elf_path, result_dir):
             return None
 
 
-# Print progress bar
-def print_progress_bar(run_time_errors, bar_length=30):
+# Status lines of the running and queued jobs
+def render_status(run_time_errors, bar_length=30):
     global jobs, job_queue, SELECTED_BENCH
-    try:
-        os.system("clear")
-    except Exception:
-        pass
+    lines = ["=== Running Jobs ==="]
 
-    print("=== Running Jobs ===")
-    
     # Separate fuzzing and analyzer jobs
     fuzzing_jobs = [j for j in jobs if j.get("job_type") != "analyzer"]
     analyzer_jobs = [j for j in jobs if j.get("job_type") == "analyzer"]
-    
+
     # Display fuzzing jobs with progress bar
     if fuzzing_jobs:
-        print("\n[FUZZING]")
+        lines += ["", "[FUZZING]"]
         grouped = {}
         for job in fuzzing_jobs:
             fields = job["desc"].split(":")
@@ -131,22 +198,32 @@ def print_progress_bar(run_time_errors, bar_length=30):
             arrow = "=" * int(percent * bar_length)
             spaces = " " * (bar_length - len(arrow))
             bar = f"[{arrow}{spaces}]"
-            print(
+            lines.append(
                 f"  {fuzzer}:{SELECTED_BENCH}:{binary}:{fuzzing_output_name} {bar} {int(percent * 100)}% ({int(elapsed)}/{int(total)} sec) x {count}"
             )
-    
+
     # Display analyzer jobs with elapsed time only
     if analyzer_jobs:
-        print("\n[ANALYZING]")
+        lines += ["", "[ANALYZING]"]
         for job in analyzer_jobs:
             elapsed = time.time() - job["start_time"]
             desc = job["desc"].replace("analyzer:", "")
-            print(f"  {desc} (elapsed: {int(elapsed)} sec)")
-    
+            status = ""
+            snapshot = read_last_progress(job["progress_path"])
+            if snapshot:
+                eta = snapshot["eta"] if snapshot["eta"] is not None else "?"
+                status = (
+                    f" {snapshot['completed']}/{snapshot['total']} seeds"
+                    f" | {snapshot['seeds_per_s']} seeds/s | ETA: {eta} sec"
+                )
+            if job.get("cpu_share"):
+                status += f" | CPUs: {job['cpu_share']['cpuset_cpus']}"
+            lines.append(f"  {desc} (elapsed: {int(elapsed)} sec){status}")
+
     if not fuzzing_jobs and not analyzer_jobs:
-        print("No jobs currently running.")
+        lines.append("No jobs currently running.")
 
-    print("\n=== Queued Jobs ===")
+    lines += ["", "=== Queued Jobs ==="]
     if job_queue:
         group_counts = {}
         for queued_job in job_queue:
@@ -162,17 +239,17 @@ def print_progress_bar(run_time_errors, bar_length=30):
             fuzzing_output_name,
             target,
         ), count in group_counts.items():
-            print(
+            lines.append(
                 f"{fuzzer}:{SELECTED_BENCH}:{target_bench}:{fuzzing_output_name}:{target} [QUEUED] x {count}"
             )
     else:
-        print("No jobs queued.")
+        lines.append("No jobs queued.")
 
     if run_time_errors:
-        print("\n=== Errors in runs: ===")
-        print(run_time_errors)
+        lines += ["", "=== Errors in runs: ===", str(run_time_errors)]
 
-    print("\nPress Enter to add new jobs, Ctrl+C to quit fuzzing campaign.")
+    lines += ["", "Press Enter to add new jobs, Ctrl+C to quit fuzzing campaign."]
+    return lines
 
 
 def check_target_has_fuzzer(target_bench, target, selected_fuzzers):
@@ -334,41 +411,40 @@ def prep_target_folder(
             return None
 
 
-# Dynamically add new jobs to the job queue
-def add_new_jobs():
+# Dynamically add new jobs to the job queue, line was typed while the manager
+# was waiting for jobs
+def add_new_jobs(line):
     global FUZZER_ACTIVE, job_queue
     try:
-        if select.select([sys.stdin], [], [], 0)[0]:
-            line = sys.stdin.readline()
-            if line == "\n":
-                print("\nEnter pressed! Add a job here.")
-                print(
-                    "Enter fuzzing_time (24h, 3600m...), fuzzing_trial, fuzzing_output_name separated by spaces (or 'q' to exit):"
-                )
-                user_input = input("> ").strip()
-                if user_input.lower() == "q":
-                    print("Exiting...")
+        if line == "\n":
+            print("\nEnter pressed! Add a job here.")
+            print(
+                "Enter fuzzing_time (24h, 3600m...), fuzzing_trial, fuzzing_output_name separated by spaces (or 'q' to exit):"
+            )
+            user_input = input("> ").strip()
+            if user_input.lower() == "q":
+                print("Exiting...")
+                return
+            args = user_input.split()
+            if len(args) == 3:
+                fuzzing_time, fuzzing_trial, fuzzing_output_name = args
+                fuzzing_time = parse_fuzzing_time(fuzzing_time)
+                if fuzzing_time is None:
+                    print("Invalid fuzzing_time format. Use 24h, 3600m, etc.")
                     return
-                args = user_input.split()
-                if len(args) == 3:
-                    fuzzing_time, fuzzing_trial, fuzzing_output_name = args
-                    fuzzing_time = parse_fuzzing_time(fuzzing_time)
-                    if fuzzing_time is None:
-                        print("Invalid fuzzing_time format. Use 24h, 3600m, etc.")
-                        return
-                    try:
-                        fuzzing_trial = int(fuzzing_trial)
-                    except ValueError:
-                        print("Invalid trial count: must be an integer.")
-                        return
-                    FUZZER_ACTIVE = True
-                    enqueue_job(fuzzing_time, fuzzing_trial, fuzzing_output_name)
-                else:
-                    print(
-                        "Invalid input. Please enter 3 arguments separated by spaces (or 'q' to exit)."
-                    )
+                try:
+                    fuzzing_trial = int(fuzzing_trial)
+                except ValueError:
+                    print("Invalid trial count: must be an integer.")
+                    return
+                FUZZER_ACTIVE = True
+                enqueue_job(fuzzing_time, fuzzing_trial, fuzzing_output_name)
             else:
-                print(f"\nInput received: {line.strip()}")
+                print(
+                    "Invalid input. Please enter 3 arguments separated by spaces (or 'q' to exit)."
+                )
+        else:
+            print(f"\nInput received: {line.strip()}")
     except Exception as e:
         print(f"Error adding new jobs: {e}")
 
@@ -391,11 +467,12 @@ def enqueue_job(fuzzing_time, fuzzing_num_trials, fuzzing_output_name):
         if targets is None:
             print("No targets selected, exiting.")
             return
+        record("settings", settings=journal_settings())
         for target_bench, target_list in targets.items():
             for fuzzer in selected_fuzzers:
                 for target in target_list:
                     for trial in range(FUZZING_NUM_TRIALS):
-                        job_queue.append(
+                        queue_job(
                             {
                                 "fuzzer": fuzzer,
                                 "target_bench": target_bench,
@@ -434,6 +511,7 @@ def check_and_queue_analyzer(job):
         if not RUN_ANALYZER:
             print(f"\n[+] All trials complete for {group_key} (analyzer skipped, use --full to enable)")
             analyzer_queued.add(group_key)  # Mark as processed so we don't check again
+            record("analyzer", group=group_key)
             return
         
         # Calculate the fuzzing_out directory path (parent of all output-XX dirs)
@@ -450,18 +528,41 @@ def check_and_queue_analyzer(job):
             "fuzzing_out_dir": fuzzing_out_dir,
             "desc": f"analyzer:{fuzzer}:{target_bench}:{output_name}:{target}",
         }
-        job_queue.append(analyzer_job)
+        queue_job(analyzer_job)
         analyzer_queued.add(group_key)
+        record("analyzer", group=group_key)
         print(f"\n[+] All trials complete! Queued analyzer job for {group_key}")
         print(f"[+] Analyzer will run in: {fuzzing_out_dir}")
 
 
-# Monitor and report job status
-def monitor_and_report_jobs(run_time_errors):
+# Jobs whose container exited or that ran past their timeout
+def due_jobs(now):
+    return [
+        job
+        for job in jobs
+        if job["proc"].poll() is not None or now - job["start_time"] > job["timeout"]
+    ]
+
+
+# Seconds until the next job times out or the status is due, capped by the
+# poll interval while the event stream is down
+def next_wakeup(now, status_due):
+    wakeup = status_due - now
+    for job in jobs:
+        wakeup = min(wakeup, job["start_time"] + job["timeout"] - now)
+    if jobs and not container_events.alive:
+        wakeup = min(wakeup, POLL_INTERVAL)
+    return max(wakeup, 0)
+
+
+# Handle jobs that exited or timed out
+def finish_jobs(finished, run_time_errors):
     global completed_trials, analyzer_queued
     now = time.time()
     try:
-        for job in jobs[:]:
+        for job in finished:
+            if job.get("placement"):
+                allocator.release(job["placement"])
             proc = job["proc"]
             elapsed = now - job["start_time"]
             # Skip timeout check for analyzer jobs
@@ -479,15 +580,19 @@ def monitor_and_report_jobs(run_time_errors):
                     f"\nForce-killing container {job['container_name']} ({job['desc']}) after {job['timeout']} seconds"
                 )
                 try:
-                    subprocess.run(["docker", "kill", job["container_name"]])
+                    job["proc"].kill()
                 except Exception as e:
                     print(f"Error killing docker container: {e}")
+                job["proc"].remove()
                 jobs.remove(job)
-            elif proc.poll() is not None:
+                record("timeout", key=job["desc"])
+            else:
                 try:
                     # Close log file if this is an analyzer job
                     if job.get("job_type") == "analyzer" and "log_file" in job:
                         try:
+                            # Let the log stream catch up with the exit
+                            job["log_thread"].join(timeout=5)
                             job["log_file"].close()
                         except Exception as e:
                             print(f"Error closing log file: {e}")
@@ -508,14 +613,13 @@ def monitor_and_report_jobs(run_time_errors):
                         
                 except Exception as e:
                     print(f"Error writing bench info at proc completion: {e}")
+                job["proc"].remove()
                 jobs.remove(job)
+                record("exit", key=job["desc"], returncode=proc.returncode)
                 if proc.returncode != 0 and proc.returncode != 124:
                     run_time_errors.append(job["desc"])
-        print_progress_bar(run_time_errors)
-        add_new_jobs()
-        time.sleep(1)
     except Exception as e:
-        print(f"Error in monitor/report loop: {e}")
+        print(f"Error handling finished jobs: {e}")
 
 
 # Force-kill all jobs
@@ -533,192 +637,370 @@ def kill_all_jobs():
             now = time.time()
             elapsed = now - job["start_time"]
             end_write_bench_info(job["output_path"], now, elapsed)
-            subprocess.run(["docker", "kill", job["container_name"]])
+            job["proc"].kill()
+            job["proc"].remove()
+            record("kill", key=job["desc"])
             print(f"Force-killed container {job['container_name']} ({job['desc']})")
         except Exception as e:
             print(f"Error force-killing container {job['container_name']}: {e}")
 
 
-# Main manager loop for fuzzing jobs
+# Pin a running container to other CPUs
+def update_container_cpus(job, placement):
+    try:
+        job["proc"].update(placement)
+    except docker.errors.APIError:
+        return False
+    return True
+
+
+# Give every running analyzer its share of the CPUs that no trial is pinned
+# to. Shares shrink before a trial starts on one of their CPUs and grow as
+# trials finish. Returns the shares of new analyzers that are about to start,
+# fewer than new when there are not enough free CPUs for all of them.
+# A share that could not be applied is retried on the next call.
+def rebalance_analyzers(new=0):
+    analyzers = [job for job in jobs if job.get("job_type") == "analyzer"]
+    if not analyzers and not new:
+        return []
+    shares = allocator.split_free(len(analyzers) + new)
+    for job, cpu_share in zip(analyzers, shares):
+        if job.get("cpu_share") != cpu_share:
+            applied = update_container_cpus(job, cpu_share)
+            job["cpu_share"] = cpu_share if applied else None
+    return shares[len(analyzers):]
+
+
+# Start an analyzer job pinned to the CPUs of cpu_share, returns the job
+def launch_analyzer(job_info, cpu_share, num_cores):
+    fuzzer = job_info.get("fuzzer")
+    fuzzing_out_dir = job_info.get("fuzzing_out_dir")
+    abs_fuzzing_out_dir = os.path.abspath(fuzzing_out_dir)
+    
+    # Validate inputs
+    if not fuzzer:
+        print(f"[!] Warning: Analyzer job has no fuzzer name, skipping: {job_info.get('desc')}")
+        return None
+    if not fuzzing_out_dir:
+        print(f"[!] Warning: Analyzer job has no fuzzing_out_dir, skipping: {job_info.get('desc')}")
+        return None
+    
+    # Get the current working directory where the user ran the fuzz command
+    firmrebugger_src = os.getcwd()
+    
+    idx = find_available_idx(num_cores)
+    if idx is None:
+        job_queue.insert(0, job_info)
+        return None
+    container_name = f"frb_analyzer_{idx}"
+    
+    # Create log file path in the fuzzing_out directory
+    log_file_path = os.path.join(abs_fuzzing_out_dir, "frb_analyzer.log")
+    
+    # Calculate relative path from firmrebugger_src to fuzzing_out_dir
+    # This will be the path inside the container under /benchmark
+    rel_path = os.path.relpath(abs_fuzzing_out_dir, firmrebugger_src)
+    container_work_dir = f"/benchmark/{rel_path}"
+    
+    run_command = [
+        "/bin/bash",
+        "-c",
+        f"cd /benchmark && uv run frb bug-analyzer {container_work_dir}",
+    ]
+    
+    try:
+        log_file = open(log_file_path, 'w')
+        
+        # Write job details header to log file
+        log_file.write("=" * 80 + "\n")
+        log_file.write("FirmReBugger Analyzer Job Log\n")
+        log_file.write("=" * 80 + "\n")
+        log_file.write(f"Job Description: {job_info.get('desc', 'N/A')}\n")
+        log_file.write(f"Fuzzer: {fuzzer}\n")
+        log_file.write(f"Fuzzing Output Dir: {fuzzing_out_dir}\n")
+        log_file.write(f"Container: {container_name}\n")
+        log_file.write(f"Docker Image: frb:{fuzzer}\n")
+        log_file.write(f"Start Time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}\n")
+        log_file.write("=" * 80 + "\n\n")
+        log_file.flush()
+        
+        remove_exited_container(get_docker_client(), container_name)
+        container = get_docker_client().containers.run(
+            f"frb:{fuzzer}",
+            run_command,
+            name=container_name,
+            labels={JOB_LABEL: job_key(job_info)},
+            environment={"FRB_IMAGE_DIGEST": get_image_digest(f"frb:{fuzzer}")},
+            mounts=[docker.types.Mount("/benchmark", firmrebugger_src, type="bind")],
+            working_dir=container_work_dir,
+            detach=True,
+            **placement_kwargs(cpu_share),
+        )
+        proc = ContainerProcess(container, container_events)
+        log_thread = stream_logs(container, log_file)
+    except Exception as e:
+        print(f"Error starting analyzer container: {e}")
+        if 'log_file' in locals():
+            log_file.close()
+        return None
+    
+    job = {
+        "proc": proc,
+        "container_name": container_name,
+        "start_time": time.time(),
+        "timeout": float('inf'),  # No timeout for analyzer
+        "output_path": fuzzing_out_dir,  # Use fuzzing_out_dir for bench_info
+        "desc": job_info["desc"],
+        "job_type": "analyzer",
+        "fuzzer": fuzzer,
+        "log_file": log_file,
+        "log_thread": log_thread,
+        "log_file_path": log_file_path,
+        "progress_path": os.path.join(
+            abs_fuzzing_out_dir, PROGRESS_FILE_NAME
+        ),
+        "cpu_share": cpu_share,
+    }
+    
+    # Add delay between spawning analyzer jobs to avoid resource contention
+    time.sleep(1)
+    return job
+
+
+# Launch queued jobs while slots are available. Analyzers are started after the trials of the pass, they share the CPUs
+# that are left.
+def launch_queued_jobs(num_cores):
+    global jobs, job_queue
+    analyzer_infos = []
+    while len(jobs) + len(analyzer_infos) < num_cores and job_queue:
+        job_info = job_queue.pop(0)
+        if job_info.get("job_type") == "analyzer":
+            analyzer_infos.append(job_info)
+            continue
+
+        # Handle fuzzing job
+        fuzzer = job_info["fuzzer"]
+        target_bench = job_info["target_bench"]
+        target = job_info["target"]
+        trial = job_info["trial"]
+        fuzzing_time = job_info["fuzzing_time"]
+        fuzzing_output_name = job_info["fuzzing_output_name"]
+
+        target_path = f"{FIRMREBUGGER_BASE_DIR}/{SELECTED_BENCH}/{target_bench}/{target}/fuzzers/{fuzzer}"
+        output_path = f"output-{trial + 1:02d}"
+        start_time = time.time()
+        timeout = int(fuzzing_time) + 60
+        result_output_path = (
+            f"{target_path}/fuzzing_out/{fuzzing_output_name}/{output_path}"
+        )
+        idx = find_available_idx(num_cores)
+        if idx is None:
+            break
+        placement = allocator.allocate()
+        if placement is None:
+            job_queue.insert(0, job_info)
+            break
+        # Every running analyzer keeps a free CPU of its own, the trial waits
+        # for one otherwise
+        num_analyzers = sum(1 for job in jobs if job.get("job_type") == "analyzer")
+        if len(allocator.free_cpus()) < num_analyzers:
+            allocator.release(placement)
+            job_queue.insert(0, job_info)
+            break
+        # Take the CPU away from the analyzers before the trial starts on it
+        rebalance_analyzers()
+        container_name = f"frb_job_{idx}"
+
+        # The result dir of a rescheduled trial was prepared by its
+        # first launch
+        if not job_info.get("resumed"):
+            prep_target_folder(
+                fuzzer,
+                target_path,
+                fuzzing_output_name,
+                output_path,
+                result_output_path,
+                start_time,
+            )
+        try:
+            remove_exited_container(get_docker_client(), container_name)
+            container = get_docker_client().containers.run(
+                f"frb_original:{fuzzer}",
+                [f"./{fuzzer}-run.sh", str(fuzzing_time), output_path],
+                name=container_name,
+                labels={JOB_LABEL: job_key(job_info)},
+                mounts=[
+                    docker.types.Mount(
+                        f"/home/user/{fuzzer}/target",
+                        f"{target_path}/fuzzing_out/{fuzzing_output_name}",
+                        type="bind",
+                    )
+                ],
+                working_dir=f"/home/user/{fuzzer}/target",
+                nano_cpus=1_000_000_000,  # --cpus=1
+                detach=True,
+                **placement_kwargs(placement),
+            )
+            proc = ContainerProcess(container, container_events)
+        except Exception as e:
+            print(f"Error starting fuzzing container: {e}")
+            allocator.release(placement)
+            continue
+        write_bench_placement(result_output_path, output_path, placement)
+        job = {
+            "proc": proc,
+            "container_name": container_name,
+            "start_time": start_time,
+            "timeout": timeout,
+            "output_path": result_output_path,
+            "desc": f"{fuzzer}:{target_bench}:{fuzzing_output_name}:{target}:trial{trial + 1}",
+            "job_type": "fuzzing",
+            "fuzzer": fuzzer,
+            "target_bench": target_bench,
+            "target": target,
+            "fuzzing_output_name": fuzzing_output_name,
+            "placement": placement,
+        }
+        jobs.append(job)
+        record("launch", key=job["desc"], job=persistent_job(job))
+    shares = rebalance_analyzers(new=len(analyzer_infos))
+    # Analyzers without a free CPU wait for a trial to finish
+    job_queue[:0] = analyzer_infos[len(shares):]
+    for job_info, cpu_share in zip(analyzer_infos, shares):
+        job = launch_analyzer(job_info, cpu_share, num_cores)
+        if job is None:
+            continue
+        jobs.append(job)
+        record("launch", key=job["desc"], job=persistent_job(job))
+
+
+# Main manager loop for fuzzing jobs. It sleeps in a selector over the docker
+# event stream and stdin, so an exited container frees its slot right away.
+# In between the status is redrawn at a bounded rate.
 def manager_loop(num_cores):
     global jobs, job_queue
     run_time_errors = []
+    tty = sys.stdout.isatty()
+    screen = LiveLines()
+    selector = selectors.DefaultSelector()
+    selector.register(get_container_events(), selectors.EVENT_READ)
     try:
-        while jobs or job_queue:
-            # Launch new jobs if slots are available
-            while len(jobs) < num_cores and job_queue:
-                job_info = job_queue.pop(0)
-                
-                # Check if this is an analyzer job or fuzzing job
-                if job_info.get("job_type") == "analyzer":
-                    # Check if there's already an analyzer running
-                    analyzer_running = any(j.get("job_type") == "analyzer" for j in jobs)
-                    if analyzer_running:
-                        # Put it back at the front of the queue and wait
-                        job_queue.insert(0, job_info)
-                        break
-                    
-                    # Handle analyzer job
-                    fuzzer = job_info.get("fuzzer")
-                    fuzzing_out_dir = job_info.get("fuzzing_out_dir")
-                    abs_fuzzing_out_dir = os.path.abspath(fuzzing_out_dir)
-                    
-                    # Validate inputs
-                    if not fuzzer:
-                        print(f"[!] Warning: Analyzer job has no fuzzer name, skipping: {job_info.get('desc')}")
-                        continue
-                    if not fuzzing_out_dir:
-                        print(f"[!] Warning: Analyzer job has no fuzzing_out_dir, skipping: {job_info.get('desc')}")
-                        continue
-                    
-                    # Get the current working directory where the user ran the fuzz command
-                    firmrebugger_src = os.getcwd()
-                    
-                    idx = find_available_idx(num_cores)
-                    if idx is None:
-                        break
-                    container_name = f"frb_analyzer_{idx}"
-                    
-                    # Create log file path in the fuzzing_out directory
-                    log_file_path = os.path.join(abs_fuzzing_out_dir, "frb_analyzer.log")
-                    
-                    # Calculate relative path from firmrebugger_src to fuzzing_out_dir
-                    # This will be the path inside the container under /benchmark
-                    rel_path = os.path.relpath(abs_fuzzing_out_dir, firmrebugger_src)
-                    container_work_dir = f"/benchmark/{rel_path}"
-                    
-                    run_cmd = [
-                        "docker",
-                        "run",
-                        "--rm",
-                        "--name",
-                        container_name,
-                        "--mount",
-                        f"type=bind,source={firmrebugger_src},target=/benchmark",
-                        "-w",
-                        container_work_dir,
-                        f"frb:{fuzzer}",
-                        "/bin/bash",
-                        "-c",
-                        f"cd /benchmark && uv run frb bug-analyzer {container_work_dir}",
-                    ]
-                    
-                    try:
-                        log_file = open(log_file_path, 'w')
-                        
-                        # Write job details header to log file
-                        log_file.write("=" * 80 + "\n")
-                        log_file.write("FirmReBugger Analyzer Job Log\n")
-                        log_file.write("=" * 80 + "\n")
-                        log_file.write(f"Job Description: {job_info.get('desc', 'N/A')}\n")
-                        log_file.write(f"Fuzzer: {fuzzer}\n")
-                        log_file.write(f"Fuzzing Output Dir: {fuzzing_out_dir}\n")
-                        log_file.write(f"Container: {container_name}\n")
-                        log_file.write(f"Docker Image: frb:{fuzzer}\n")
-                        log_file.write(f"Start Time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}\n")
-                        log_file.write("=" * 80 + "\n\n")
-                        log_file.flush()
-                        
-                        proc = subprocess.Popen(
-                            run_cmd, 
-                            stdout=log_file,
-                            stderr=subprocess.STDOUT,
-                            preexec_fn=os.setsid
-                        )
-                    except Exception as e:
-                        print(f"Error starting analyzer container: {e}")
-                        if 'log_file' in locals():
-                            log_file.close()
-                        continue
-                    
-                    job = {
-                        "proc": proc,
-                        "container_name": container_name,
-                        "start_time": time.time(),
-                        "timeout": float('inf'),  # No timeout for analyzer
-                        "output_path": fuzzing_out_dir,  # Use fuzzing_out_dir for bench_info
-                        "desc": job_info["desc"],
-                        "job_type": "analyzer",
-                        "fuzzer": fuzzer,
-                        "log_file": log_file,
-                        "log_file_path": log_file_path,
-                    }
-                    jobs.append(job)
-                    
-                    # Add delay between spawning analyzer jobs to avoid resource contention
-                    time.sleep(1)
-                else:
-                    # Handle fuzzing job
-                    fuzzer = job_info["fuzzer"]
-                    target_bench = job_info["target_bench"]
-                    target = job_info["target"]
-                    trial = job_info["trial"]
-                    fuzzing_time = job_info["fuzzing_time"]
-                    fuzzing_output_name = job_info["fuzzing_output_name"]
-
-                    target_path = f"{FIRMREBUGGER_BASE_DIR}/{SELECTED_BENCH}/{target_bench}/{target}/fuzzers/{fuzzer}"
-                    output_path = f"output-{trial + 1:02d}"
-                    start_time = time.time()
-                    timeout = int(fuzzing_time) + 60
-                    result_output_path = (
-                        f"{target_path}/fuzzing_out/{fuzzing_output_name}/{output_path}"
-                    )
-                    idx = find_available_idx(num_cores)
-                    if idx is None:
-                        break
-                    core_id = idx % num_cores
-                    container_name = f"frb_job_{idx}"
-
-                    prep_target_folder(
-                        fuzzer,
-                        target_path,
-                        fuzzing_output_name,
-                        output_path,
-                        result_output_path,
-                        start_time,
-                    )
-                    run_cmd = [
-                        "docker",
-                        "run",
-                        "--cpus=1",
-                        f"--cpuset-cpus={core_id}",
-                        "--rm",
-                        "--name",
-                        container_name,
-                        "--mount",
-                        f"type=bind,source={target_path}/fuzzing_out/{fuzzing_output_name},target=/home/user/{fuzzer}/target",
-                        "-w",
-                        f"/home/user/{fuzzer}/target",
-                        f"frb_original:{fuzzer}",
-                        f"./{fuzzer}-run.sh",
-                        str(fuzzing_time),
-                        output_path,
-                    ]
-                    try:
-                        proc = subprocess.Popen(run_cmd, preexec_fn=os.setsid)
-                    except Exception as e:
-                        print(f"Error starting fuzzing container: {e}")
-                        continue
-                    job = {
-                        "proc": proc,
-                        "container_name": container_name,
-                        "start_time": start_time,
-                        "timeout": timeout,
-                        "output_path": result_output_path,
-                        "desc": f"{fuzzer}:{target_bench}:{fuzzing_output_name}:{target}:trial{trial + 1}",
-                        "job_type": "fuzzing",
-                        "fuzzer": fuzzer,
-                        "target_bench": target_bench,
-                        "target": target,
-                        "fuzzing_output_name": fuzzing_output_name,
-                    }
-                    jobs.append(job)
-            monitor_and_report_jobs(run_time_errors)
+        selector.register(sys.stdin, selectors.EVENT_READ)
+    except (AttributeError, ValueError, OSError):
+        pass  # stdin is closed or can not be waited on
+    status_interval = REDRAW_INTERVAL if tty else STATUS_LOG_INTERVAL
+    try:
+        while True:
+            launch_queued_jobs(num_cores)
+            rebalance_analyzers()
+            if not jobs and not job_queue:
+                record("end")
+                break
+            status_due = 0
+            line = None
+            while True:
+                now = time.time()
+                if now >= status_due:
+                    rebalance_analyzers()
+                    if tty:
+                        screen.draw(fit_terminal(render_status(run_time_errors)))
+                    else:
+                        print("\n".join(render_status(run_time_errors)))
+                        sys.stdout.flush()
+                    status_due = now + status_interval
+                events = selector.select(next_wakeup(now, status_due))
+                if any(key.fileobj is container_events for key, _ in events):
+                    container_events.drain()
+                if any(key.fileobj is sys.stdin for key, _ in events):
+                    line = sys.stdin.readline()
+                    if not line:
+                        selector.unregister(sys.stdin)
+                finished = due_jobs(time.time())
+                if line or finished:
+                    break
+            # Typed lines are echoed below the status block
+            screen.erase(1 if line and sys.stdin.isatty() else 0)
+            if finished:
+                finish_jobs(finished, run_time_errors)
+            if line:
+                add_new_jobs(line)
     except KeyboardInterrupt:
         print("\nKeyboardInterrupt detected, force-killing all containers...")
         kill_all_jobs()
     except Exception as e:
         print(f"Error in manager_loop: {e}")
+    finally:
+        selector.close()
+
+
+# Image ID used to key the analyzer's replay cache
+def get_image_digest(image_name):
+    try:
+        return get_docker_client().images.get(image_name).id
+    except Exception as e:
+        print(f"Error getting image digest for {image_name}: {e}")
+        return ""
+
+
+# Event stream of the job containers, subscribed before the first container
+# is started or adopted so no exit is missed
+def get_container_events():
+    global container_events
+    if container_events is None:
+        container_events = ContainerEvents(get_docker_client())
+    return container_events
+
+
+# Running container of a journaled job, if it is still there
+def find_job_container(client, job):
+    try:
+        container = client.containers.get(job["container_name"])
+    except docker.errors.NotFound:
+        return None
+    if container.status != "running":
+        return None
+    if container.labels.get(JOB_LABEL) != job["desc"]:
+        return None
+    return container
+
+
+# Move the output of an interrupted trial out of the way of its rerun, the
+# analyzers only pick up output-XX dirs
+def set_aside_trial_output(output_path):
+    if not os.path.exists(output_path):
+        return
+    stale_path = os.path.join(
+        os.path.dirname(output_path),
+        f"interrupted-{os.path.basename(output_path)}-{int(time.time())}",
+    )
+    try:
+        os.rename(output_path, stale_path)
+        print(f"[+] Moved interrupted trial output to {stale_path}")
+    except OSError as e:
+        print(f"Error moving interrupted trial output {output_path}: {e}")
+
+
+# A job of the journal that was running when the manager went away and whose
+# container is gone. Trials that had their full fuzzing time and analyzers
+# that finished their progress stream are counted as done.
+def recover_finished_job(job, job_info):
+    if job.get("job_type") == "analyzer":
+        snapshot = read_last_progress(job["progress_path"])
+        return snapshot is not None and snapshot.get("done")
+    end_time = job["start_time"] + int(job_info["fuzzing_time"])
+    if time.time() < end_time:
+        return False
+    end_write_bench_info(job["output_path"], end_time, end_time - job["start_time"])
+    if job.get("job_type") == "fuzzing":
+        check_and_queue_analyzer(job)
+    return True
+
+
+# Set up the core allocator, one job slot per CPU it hands out
+def init_allocator():
+    global allocator
+    allocator = CoreAllocator(read_cpu_topology(), RESERVE_SIBLINGS)
+    return len(allocator)
 
 
 # Find avaliable core for job
@@ -734,15 +1016,13 @@ def find_available_idx(max_idx):
 # Start the fuzzing benchmark
 def start_bench(fuzzers, targets, fuzzing_output_name):
     global job_queue, FUZZER_ACTIVE
-    num_cores = (os.cpu_count() or 1) - 1
-    if num_cores < 1:
-        num_cores = 1
+    num_cores = init_allocator()
 
     for target_bench, target_list in targets.items():
         for fuzzer in fuzzers:
             for target in target_list:
                 for trial in range(FUZZING_NUM_TRIALS):
-                    job_queue.append(
+                    queue_job(
                         {
                             "job_type": "fuzzing",
                             "fuzzer": fuzzer,
@@ -759,17 +1039,28 @@ def start_bench(fuzzers, targets, fuzzing_output_name):
 
 
 # Fuzzing
-def fuzz(fuzzing_time, fuzzing_num_trials, fuzzing_output_name, run_analyzer=False):
-    global FIRMREBUGGER_BASE_DIR
+def fuzz(
+    fuzzing_time,
+    fuzzing_num_trials,
+    fuzzing_output_name,
+    run_analyzer=False,
+    reserve_siblings=False,
+):
+    global FIRMREBUGGER_BASE_DIR, RESERVE_SIBLINGS, journal
     try:
         FIRMREBUGGER_BASE_DIR = get_frb_base_dir()
+        journal_path = get_journal_path(FIRMREBUGGER_BASE_DIR, fuzzing_output_name)
+        if os.path.exists(journal_path):
+            print(
+                f"Campaign {fuzzing_output_name} already exists ({journal_path}). "
+                f"Use --resume {fuzzing_output_name} or another --output-name."
+            )
+            return
         global FUZZING_TIME, FUZZING_OUTPUT_NAME, FUZZING_NUM_TRIALS, RUN_ANALYZER
         FUZZING_TIME = fuzzing_time
         RUN_ANALYZER = run_analyzer
-        if FUZZING_TIME is None:
-            if FUZZER_ACTIVE:
-                return
-            print("Invalid Format for fuzzing_time. Use 24h, 3600m, etc.")
+        RESERVE_SIBLINGS = reserve_siblings
+        if FUZZER_ACTIVE:
             return
 
         FUZZING_OUTPUT_NAME = fuzzing_output_name
@@ -782,7 +1073,81 @@ def fuzz(fuzzing_time, fuzzing_num_trials, fuzzing_output_name, run_analyzer=Fal
         if targets is None:
             print("No targets selected, exiting.")
             return
+        journal = CampaignJournal(journal_path)
+        record("start", campaign=fuzzing_output_name, settings=journal_settings())
         start_bench(selected_fuzzers, targets, fuzzing_output_name)
     except Exception as e:
         print(f"Error in fuzz(): {e}")
 
+
+# Resume a campaign from its journal. Jobs whose container is still running
+# are adopted, finished trials are skipped and everything else is queued
+# again in its original order.
+def resume_fuzz(campaign):
+    global FIRMREBUGGER_BASE_DIR, SELECTED_BENCH, FUZZING_TIME, FUZZING_OUTPUT_NAME
+    global FUZZING_NUM_TRIALS, RUN_ANALYZER, RESERVE_SIBLINGS, journal
+    try:
+        FIRMREBUGGER_BASE_DIR = get_frb_base_dir()
+        journal_path = get_journal_path(FIRMREBUGGER_BASE_DIR, campaign)
+        if not os.path.exists(journal_path):
+            print(f"No journal found for campaign {campaign} at {journal_path}.")
+            return
+        state = replay_journal(read_journal(journal_path))
+        if state["ended"]:
+            print(f"Campaign {campaign} already finished.")
+            return
+        settings = state["settings"]
+        SELECTED_BENCH = settings["bench"]
+        FUZZING_TIME = settings["fuzzing_time"]
+        FUZZING_OUTPUT_NAME = campaign
+        FUZZING_NUM_TRIALS = settings["num_trials"]
+        RUN_ANALYZER = settings["run_analyzer"]
+        RESERVE_SIBLINGS = settings.get("reserve_siblings", False)
+        num_cores = init_allocator()
+        completed_trials.update(state["completed_trials"])
+        analyzer_queued.update(state["analyzer_queued"])
+
+        journal = CampaignJournal(journal_path)
+        record("resume")
+        client = get_docker_client()
+        events = get_container_events()
+        requeue = []
+        for key, entry in state["jobs"].items():
+            job_info = entry["job_info"]
+            job = entry["launch"]
+            if entry["state"] == "done":
+                continue
+            if entry["state"] == "running":
+                container = find_job_container(client, job)
+                if container is not None:
+                    job["proc"] = ContainerProcess(container, events)
+                    # It may have exited before the events were subscribed
+                    job["proc"].refresh()
+                    if job.get("job_type") == "analyzer":
+                        job["log_file"] = open(job["log_file_path"], "a")
+                        job["log_thread"] = stream_logs(
+                            container, job["log_file"], since=int(time.time())
+                        )
+                    if job.get("placement"):
+                        allocator.claim(job["placement"])
+                    jobs.append(job)
+                    record("adopt", key=key)
+                    print(f"[+] Adopted running container {job['container_name']} ({key})")
+                    continue
+                if recover_finished_job(job, job_info):
+                    record("exit", key=key, returncode=None)
+                    print(f"[+] {key} finished while the manager was down")
+                    continue
+            if job is not None and job.get("job_type") == "fuzzing":
+                set_aside_trial_output(job["output_path"])
+                job_info = dict(job_info, resumed=True)
+            requeue.append(job_info)
+        for job_info in requeue:
+            queue_job(job_info)
+        print(
+            f"[+] Resuming {campaign}: {len(jobs)} running, {len(job_queue)} queued"
+        )
+        manager_loop(num_cores)
+    except Exception as e:
+        print(f"Error in resume_fuzz(): {e}")
+
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+
+# Journals of the fuzzing campaigns, one per output name, below the base dir
+JOURNAL_DIR_NAME = "fuzzing_campaigns"
+
+# Label with the job key on every container, running containers are only
+# re-adopted by a resumed manager when it matches
+JOB_LABEL = "frb.job"
+
+# Keys of a running job that only make sense in the manager that started it
+RUNTIME_KEYS = ("proc", "log_file", "log_thread")
+
+
+def get_journal_path(base_dir, campaign):
+    return os.path.join(base_dir, JOURNAL_DIR_NAME, f"{campaign}.jsonl")
+
+
+# Key of a queued or running job, the desc the manager shows for it
+def job_key(job_info):
+    if job_info.get("job_type") == "analyzer":
+        return job_info["desc"]
+    return (
+        f"{job_info['fuzzer']}:{job_info['target_bench']}:"
+        f"{job_info['fuzzing_output_name']}:{job_info['target']}:"
+        f"trial{job_info['trial'] + 1}"
+    )
+
+
+# Fields of a running job that are written to the journal at its launch
+def persistent_job(job):
+    return {key: value for key, value in job.items() if key not in RUNTIME_KEYS}
+
+
+# Fuzzing group of a trial as counted by the analyzer hand-off
+def group_key(job_info):
+    return (
+        f"{job_info.get('fuzzer')}:{job_info.get('target_bench')}:"
+        f"{job_info.get('target')}:{job_info.get('fuzzing_output_name')}"
+    )
+
+
+# Append-only record of a fuzzing campaign. Every record is flushed to disk
+# before the manager acts on it, so a killed manager loses at most the record
+# of the step it was in.
+class CampaignJournal:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        drop_partial_record(path)
+        self._file = open(path, "a")
+
+    def write(self, event, **fields):
+        record = {"event": event, "time": round(time.time(), 3), **fields}
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# Cut a record that a crash left without its newline, new records would be
+# appended to it
+def drop_partial_record(path):
+    try:
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+    except FileNotFoundError:
+        pass
+
+
+# Records of a journal, a line cut off by a crash ends it
+def read_journal(path):
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+# State of a campaign from its journal. jobs maps the key of every job to its
+# queued job info, the job of its last launch and its state: queued, running,
+# done or killed. Trials are counted per fuzzing group when they are done.
+def replay_journal(records):
+    state = {
+        "settings": {},
+        "jobs": {},
+        "completed_trials": {},
+        "analyzer_queued": set(),
+        "ended": False,
+    }
+    jobs = state["jobs"]
+    for record in records:
+        event = record["event"]
+        if event in ("start", "settings"):
+            state["settings"].update(record["settings"])
+        elif event == "enqueue":
+            jobs[record["key"]] = {
+                "job_info": record["job"],
+                "launch": None,
+                "state": "queued",
+            }
+        elif event == "launch":
+            jobs[record["key"]].update(launch=record["job"], state="running")
+        elif event in ("exit", "timeout"):
+            jobs[record["key"]]["state"] = "done"
+        elif event == "kill":
+            jobs[record["key"]]["state"] = "killed"
+        elif event == "analyzer":
+            state["analyzer_queued"].add(record["group"])
+        elif event == "end":
+            state["ended"] = True
+    for entry in jobs.values():
+        job_info = entry["job_info"]
+        if entry["state"] == "done" and job_info.get("job_type") != "analyzer":
+            group = group_key(job_info)
+            state["completed_trials"][group] = (
+                state["completed_trials"].get(group, 0) + 1
+            )
+    return state
@@ -0,0 +1,168 @@
+import os
+import threading
+import docker
+
+from firmrebugger.fuzz_utils.campaign_journal import JOB_LABEL
+
+_client = None
+_client_lock = threading.Lock()
+
+
+# One docker-py client for the whole manager, its HTTP connections to the
+# daemon are pooled and reused by every create, kill and update
+def get_docker_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = docker.from_env()
+        return _client
+
+
+# docker-py options that pin a container to a placement of the allocator
+def placement_kwargs(placement):
+    kwargs = {"cpuset_cpus": placement["cpuset_cpus"]}
+    if placement["cpuset_mems"] is not None:
+        kwargs["cpuset_mems"] = placement["cpuset_mems"]
+    return kwargs
+
+
+# Die events of the job containers, read by a thread from the daemon's event
+# stream. The exit code is handed to the ContainerProcess of the container and
+# every event wakes the manager through a pipe. If the stream breaks, alive is
+# cleared and the processes fall back to asking the API.
+class ContainerEvents:
+    def __init__(self, client):
+        self.client = client
+        self.alive = True
+        self._processes = {}
+        self._exits = {}
+        self._lock = threading.Lock()
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        self._stream = client.events(
+            decode=True,
+            filters={"type": "container", "event": "die", "label": JOB_LABEL},
+        )
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            for event in self._stream:
+                attributes = event.get("Actor", {}).get("Attributes", {})
+                self._exited(event["id"], int(attributes.get("exitCode", -1)))
+        except Exception:
+            pass
+        self.alive = False
+        self._wake()
+
+    def _exited(self, container_id, returncode):
+        with self._lock:
+            process = self._processes.pop(container_id, None)
+            if process is None:
+                # Died before its process was registered
+                self._exits[container_id] = returncode
+                return
+        process.returncode = returncode
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._write_fd, b"\0")
+        except OSError:
+            pass
+
+    def register(self, process):
+        with self._lock:
+            returncode = self._exits.pop(process.container.id, None)
+            if returncode is None:
+                self._processes[process.container.id] = process
+        if returncode is not None:
+            process.returncode = returncode
+
+    def fileno(self):
+        return self._read_fd
+
+    # Empty the wake-up pipe once the manager woke up
+    def drain(self):
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+
+# Popen-like handle of a job container. returncode is set from its die event,
+# poll() only asks the API while the event stream is down.
+class ContainerProcess:
+    def __init__(self, container, events):
+        self.container = container
+        self.returncode = None
+        self._events = events
+        events.register(self)
+
+    def poll(self):
+        if self.returncode is None and not self._events.alive:
+            self.refresh()
+        return self.returncode
+
+    # Read the state of the container from the API, e.g. for a container that
+    # may have exited before the event stream was subscribed. Job containers
+    # are kept until the manager removes them, so the exit code is still there.
+    def refresh(self):
+        try:
+            self.container.reload()
+        except docker.errors.NotFound:
+            # Removed behind the manager's back, its exit code is gone
+            self.returncode = -1
+            return
+        if self.container.status in ("exited", "dead"):
+            self.returncode = self.container.attrs["State"]["ExitCode"]
+
+    def kill(self):
+        try:
+            self.container.kill()
+        except docker.errors.APIError:
+            pass  # Already exited or removed
+
+    # Remove the container once its exit was handled
+    def remove(self):
+        try:
+            self.container.remove(force=True)
+        except docker.errors.APIError:
+            pass  # Already removed
+
+    def update(self, placement):
+        self.container.update(**placement_kwargs(placement))
+
+
+# Remove a stopped job container of a manager that went away, it would block
+# its name
+def remove_exited_container(client, name):
+    try:
+        container = client.containers.get(name)
+    except docker.errors.NotFound:
+        return
+    if container.status != "running" and JOB_LABEL in container.labels:
+        container.remove(force=True)
+
+
+# Copy the output of a container to an open log file until the container is
+# gone, the file is closed at the end of the stream. With since only output
+# from that time on is copied.
+def stream_logs(container, log_file, since=None):
+    def run():
+        try:
+            for chunk in container.logs(stream=True, follow=True, since=since):
+                log_file.write(chunk.decode(errors="replace"))
+                log_file.flush()
+        except Exception as e:
+            try:
+                log_file.write(f"\nLog stream ended: {e}\n")
+            except ValueError:
+                pass
+        finally:
+            log_file.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
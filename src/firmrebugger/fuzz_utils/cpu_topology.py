@@ -0,0 +1,148 @@
+import os
+
+SYSFS_CPU_DIR = "/sys/devices/system/cpu"
+SYSFS_NODE_DIR = "/sys/devices/system/node"
+
+# Physical cores left to the manager and the rest of the host
+HOST_CORES = 1
+
+
+# Parse a kernel cpulist like 0-3,8,10-11
+def parse_cpulist(text):
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        cpus.extend(range(int(first), int(last) + 1) if sep else [int(first)])
+    return cpus
+
+
+def format_cpulist(cpus):
+    return ",".join(str(cpu) for cpu in sorted(cpus))
+
+
+def _read(path):
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+# One entry per physical core: its package, NUMA node and SMT sibling CPUs.
+# Only CPUs the process may run on are included. Without sysfs every CPU is
+# its own core on an unknown node.
+def read_cpu_topology(cpu_dir=SYSFS_CPU_DIR, node_dir=SYSFS_NODE_DIR):
+    try:
+        allowed = os.sched_getaffinity(0)
+    except AttributeError:
+        allowed = set(range(os.cpu_count() or 1))
+    try:
+        online = parse_cpulist(_read(os.path.join(cpu_dir, "online")))
+    except OSError:
+        online = sorted(allowed)
+
+    node_of = {}
+    try:
+        for entry in os.listdir(node_dir):
+            if entry.startswith("node") and entry[4:].isdigit():
+                cpulist = _read(os.path.join(node_dir, entry, "cpulist"))
+                for cpu in parse_cpulist(cpulist):
+                    node_of[cpu] = int(entry[4:])
+    except OSError:
+        pass
+
+    cores = {}
+    for cpu in online:
+        if cpu not in allowed:
+            continue
+        topology_dir = os.path.join(cpu_dir, f"cpu{cpu}", "topology")
+        try:
+            package = int(_read(os.path.join(topology_dir, "physical_package_id")))
+            core_id = int(_read(os.path.join(topology_dir, "core_id")))
+        except (OSError, ValueError):
+            package, core_id = 0, cpu
+        core = cores.setdefault(
+            (package, core_id),
+            {"package": package, "core": core_id, "node": node_of.get(cpu), "cpus": []},
+        )
+        core["cpus"].append(cpu)
+    return sorted(cores.values(), key=lambda core: min(core["cpus"]))
+
+
+# Hands out one CPU per fuzzing container. The first thread of every physical
+# core is used before any SMT sibling, so trials only share a core once there
+# are more trials than cores. With reserve_siblings the siblings stay idle and
+# every trial has a core to itself. The lowest cores are left to the host.
+# The CPUs of the slots that no trial holds can be shared out to analyzers.
+class CoreAllocator:
+    def __init__(self, cores, reserve_siblings=False, host_cores=HOST_CORES):
+        cores = sorted(cores, key=lambda core: min(core["cpus"]))
+        if len(cores) > host_cores:
+            cores = cores[host_cores:]
+        self.reserve_siblings = reserve_siblings
+        self.has_nodes = all(core["node"] is not None for core in cores)
+        self._core_of = {}
+        ranked = []
+        for core in cores:
+            for rank, cpu in enumerate(sorted(core["cpus"])):
+                self._core_of[cpu] = core
+                if rank == 0 or not reserve_siblings:
+                    ranked.append((rank, core["node"] or 0, min(core["cpus"]), cpu))
+        self.slots = [cpu for _, _, _, cpu in sorted(ranked)]
+        self.used = set()
+
+    def __len__(self):
+        return len(self.slots)
+
+    # Placement of the next trial, None when every slot is taken
+    def allocate(self):
+        for cpu in self.slots:
+            if cpu not in self.used:
+                self.used.add(cpu)
+                return self.placement(cpu)
+        return None
+
+    # Take the CPU of a placement that is already running, e.g. of an
+    # adopted container
+    def claim(self, placement):
+        self.used.add(placement["cpu"])
+
+    def release(self, placement):
+        self.used.discard(placement["cpu"])
+
+    # CPUs no trial is pinned to
+    def free_cpus(self):
+        return sorted(cpu for cpu in self.slots if cpu not in self.used)
+
+    # Split the free CPUs into count shares of neighbouring CPUs. With fewer
+    # free CPUs than shares, only one share per free CPU is returned.
+    def split_free(self, count):
+        free = self.free_cpus()
+        count = min(count, len(free))
+        shares = []
+        for idx in range(count):
+            share = free[idx * len(free) // count : (idx + 1) * len(free) // count]
+            shares.append(self.share_placement(share))
+        return shares
+
+    # Placement of a job that runs on several CPUs, e.g. an analyzer
+    def share_placement(self, cpus):
+        nodes = {self._core_of[cpu]["node"] for cpu in cpus}
+        return {
+            "cpus": list(cpus),
+            "cpuset_cpus": format_cpulist(cpus),
+            "cpuset_mems": format_cpulist(nodes) if self.has_nodes else None,
+        }
+
+    def placement(self, cpu):
+        core = self._core_of[cpu]
+        return {
+            "cpu": cpu,
+            "cpuset_cpus": str(cpu),
+            "cpuset_mems": str(core["node"]) if self.has_nodes else None,
+            "package": core["package"],
+            "core": core["core"],
+            "node": core["node"],
+            "siblings": format_cpulist(core["cpus"]),
+            "reserve_siblings": self.reserve_siblings,
+        }
+